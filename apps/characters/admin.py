@@ -4,6 +4,7 @@ from characters.models import (
     Character,
     CharactersAPIKey,
 )
+from characters.visibility import update_characters
 
 
 @admin.register(Character)
@@ -26,13 +27,27 @@ class CharacterAdmin(admin.ModelAdmin):
     actions = ['make_available', 'make_unavailable']
 
     def make_available(self, request, queryset):
-        queryset.update(is_available=True)
+        self._set_available(queryset, is_available=True)
     make_available.short_description = 'Сделать доступными'
 
     def make_unavailable(self, request, queryset):
-        queryset.update(is_available=False)
+        self._set_available(queryset, is_available=False)
     make_unavailable.short_description = 'Сделать недоступными'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(
+            deleted_at__isnull=True,
+        )
+
+    def delete_queryset(self, request, queryset):
+        # queryset удаляет мягко, как и отдельный персонаж
+        queryset.delete()
+
+    def _set_available(self, queryset, is_available: bool):
+        update_characters(
+            characters=queryset,
+            is_available=is_available,
+        )
 
 
 @admin.register(CharactersAPIKey)
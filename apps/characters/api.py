@@ -1,14 +1,56 @@
+from collections.abc import Iterator
+
+from django.http import (
+    HttpResponse,
+    StreamingHttpResponse,
+)
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from characters.services import (
     get_key,
+    get_catalog_by_level,
+    get_catalog_version_by_ids,
     get_characters_by_level,
+    get_changes_by_level,
     get_characters_by_ids,
+    get_leaderboard_by_level,
+    get_stats_by_level,
+    get_version_by_level,
+)
+
+from utils.conditional_requests import (
+    is_not_modified,
+    set_validators,
 )
 
 
+def make_response(status_code: int, response_data: dict | Iterator) -> HttpResponse:
+    if isinstance(response_data, Iterator):
+        return StreamingHttpResponse(
+            streaming_content=response_data,
+            status=status_code,
+            content_type='application/json',
+        )
+    return Response(
+        status=status_code,
+        data=response_data
+    )
+
+
+def make_content_response(content: bytes | Iterator) -> HttpResponse:
+    if isinstance(content, Iterator):
+        return StreamingHttpResponse(
+            streaming_content=content,
+            content_type='application/json',
+        )
+    return HttpResponse(
+        content=content,
+        content_type='application/json',
+    )
+
+
 class APIKeyView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -23,26 +65,131 @@ class APIKeyView(APIView):
         )
 
 
-class CharacterListView(APIView):
+class CharacterStatsView(APIView):
+
+    def get(self, request):
+        api_key = request.headers.get('Api-Key', '')
+        status_code, response_data = get_stats_by_level(
+            api_key=api_key,
+        )
+        return Response(
+            status=status_code,
+            data=response_data
+        )
+
+
+class CharacterChangesView(APIView):
 
     def get(self, request):
         api_key = request.headers.get('Api-Key', '')
-        status_code, response_data = get_characters_by_level(
+        params = request.query_params
+        status_code, response_data = get_changes_by_level(
             api_key=api_key,
+            params=params,
         )
         return Response(
             status=status_code,
             data=response_data
         )
 
+
+class CharacterLeaderboardView(APIView):
+
+    def get(self, request, stat):
+        api_key = request.headers.get('Api-Key', '')
+        params = request.query_params
+        status_code, response_data = get_leaderboard_by_level(
+            api_key=api_key,
+            stat=stat,
+            params=params,
+        )
+        return Response(
+            status=status_code,
+            data=response_data
+        )
+
+
+class CharacterListView(APIView):
+
+    def get(self, request):
+        api_key = request.headers.get('Api-Key', '')
+        params = request.query_params
+        # версия вычисляется без сборки списка, поэтому 304 не читает персонажей
+        status_code, version = get_version_by_level(
+            api_key=api_key,
+            params=params,
+        )
+        if status_code != 200:
+            return Response(
+                status=status_code,
+                data=version
+            )
+
+        etag = version['etag']
+        last_modified = version['last_modified']
+        if is_not_modified(request, etag=etag, last_modified=last_modified):
+            response = HttpResponse(
+                status=304,
+            )
+            return set_validators(response, etag=etag, last_modified=last_modified)
+
+        if params:
+            status_code, response_data = get_characters_by_level(
+                api_key=api_key,
+                params=params,
+            )
+            response = make_response(
+                status_code=status_code,
+                response_data=response_data,
+            )
+        else:
+            status_code, response_data = get_catalog_by_level(
+                api_key=api_key,
+            )
+            if status_code != 200:
+                return Response(
+                    status=status_code,
+                    data=response_data
+                )
+            response = make_content_response(
+                content=response_data['content'],
+            )
+        if status_code == 200:
+            set_validators(response, etag=etag, last_modified=last_modified)
+        return response
+
     def post(self, request):
         api_key = request.headers.get('Api-Key', '')
         data = request.data
+        params = request.query_params
+        status_code, version = get_catalog_version_by_ids(
+            api_key=api_key,
+            data=data,
+            params=params,
+        )
+        if status_code != 200:
+            return Response(
+                status=status_code,
+                data=version
+            )
+
+        etag = version['etag']
+        last_modified = version['last_modified']
+        if is_not_modified(request, etag=etag, last_modified=last_modified):
+            response = HttpResponse(
+                status=304,
+            )
+            return set_validators(response, etag=etag, last_modified=last_modified)
+
         status_code, response_data = get_characters_by_ids(
             api_key=api_key,
             data=data,
+            params=params,
         )
-        return Response(
-            status=status_code,
-            data=response_data
+        response = make_response(
+            status_code=status_code,
+            response_data=response_data,
         )
+        if status_code in (200, 206):
+            set_validators(response, etag=etag, last_modified=last_modified)
+        return response
@@ -5,3 +5,6 @@ class CharactersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'characters'
     verbose_name = 'Персонажи'
+
+    def ready(self):
+        import characters.signals  # noqa: F401
@@ -0,0 +1,549 @@
+import hashlib
+import json
+import time
+from itertools import (
+    chain,
+    islice,
+)
+from typing import (
+    Iterable,
+    Iterator,
+)
+
+from django.core.cache import cache
+from django.db.models import (
+    Q,
+    QuerySet,
+)
+from rest_framework.renderers import JSONRenderer
+
+from config.settings import (
+    CHARACTERS_CATALOG_TTL,
+    CHARACTERS_DISABLED_LEVELS_TTL,
+    CHARACTERS_IDS_CHUNK_SIZE,
+    CHARACTERS_STREAMING_CHUNK_SIZE,
+)
+
+from characters.models import (
+    Character,
+    CharactersAPIKey,
+    CharacterVisibility,
+)
+from characters.serializers import CharacterRowEncoder
+
+from utils.cache import is_shared_cache
+from utils.constants import (
+    ACCESS_LEVELS,
+    CHARACTER_STATS,
+)
+from utils.logger import get_logger
+from utils.response_patterns import generate_response
+
+
+logger = get_logger(__name__)
+
+DISABLED_LEVELS_CACHE_KEY = 'characters:disabled_levels'
+CATALOG_CACHE_KEY = 'characters:catalog:{level}'
+CATALOG_MODIFIED_CACHE_KEY = 'characters:catalog:{level}:modified'
+CHARACTERS_VERSION_CACHE_KEY = 'characters:version'
+
+
+def bump_characters_version() -> int:
+    '''
+    Смена общей версии персонажей после изменения персонажей
+    или отключенных уровней
+
+    Returns:
+        Новая версия
+        1720000000000000000
+    '''
+
+    version = time.time_ns()
+    # без общего кэша смена версии не доходит до других процессов,
+    # поэтому версия в них живет не дольше каталогов
+    timeout = None if is_shared_cache() else CHARACTERS_CATALOG_TTL
+    cache.set(CHARACTERS_VERSION_CACHE_KEY, version, timeout=timeout)
+    return version
+
+
+def get_characters_version() -> int:
+    '''
+    Получение общей версии персонажей
+
+    Returns:
+        Версия
+        1720000000000000000
+    '''
+
+    version = cache.get(CHARACTERS_VERSION_CACHE_KEY)
+    if version is None:
+        version = bump_characters_version()
+    return version
+
+
+def get_characters_validators(level: int, *parts) -> dict:
+    '''
+    Получение версии ответа со списком персонажей уровня по общей версии
+    персонажей и отключенных уровней без сборки каталога
+
+    Args:
+        level: уровень доступа
+        parts: параметры запроса, от которых зависит ответ
+            {"fields": ["id,name"]}
+
+    Returns:
+        Словарь данных
+        {
+            "etag": "2c26b46...",
+            "last_modified": 1720000000
+        }
+    '''
+
+    version = get_characters_version()
+    key = json.dumps(
+        [version, get_disabled_levels_snapshot()['version'], level, *parts],
+        sort_keys=True,
+    )
+    return {
+        'etag': hashlib.sha256(key.encode()).hexdigest(),
+        'last_modified': version // 10 ** 9,
+    }
+
+
+def load_disabled_levels() -> list:
+    '''
+    Получение отключенных уровней из базы данных
+
+    Returns:
+        Список уровней
+        [1]
+    '''
+
+    levels = CharactersAPIKey.objects.filter(
+        activated=False,
+    ).values_list('access_level', flat=True)
+    return sorted(set(levels) - {None})
+
+
+def make_disabled_levels_snapshot() -> dict:
+    '''
+    Сборка снимка отключенных уровней и сохранение в кэш на короткое время,
+    версия вычисляется по уровням, поэтому не меняется при перечитывании
+
+    Returns:
+        Словарь данных
+        {
+            "version": 2882363287133217585,
+            "levels": [1]
+        }
+    '''
+
+    levels = load_disabled_levels()
+    digest = hashlib.sha256(json.dumps(levels).encode()).digest()
+    snapshot = {
+        'version': int.from_bytes(digest[:8], 'big'),
+        'levels': levels,
+    }
+    # отключение уровня ограничивает доступ, поэтому снимок перечитывается
+    # из базы данных даже без общего кэша между процессами
+    cache.set(DISABLED_LEVELS_CACHE_KEY, snapshot, timeout=CHARACTERS_DISABLED_LEVELS_TTL)
+    return snapshot
+
+
+def rebuild_disabled_levels() -> dict:
+    '''
+    Пересборка снимка отключенных уровней после изменения API ключей,
+    вызывается после фиксации транзакции
+
+    Returns:
+        Словарь данных, см. make_disabled_levels_snapshot
+    '''
+
+    snapshot = make_disabled_levels_snapshot()
+    bump_characters_version()
+    return snapshot
+
+
+def get_disabled_levels_snapshot() -> dict:
+    '''
+    Получение снимка отключенных уровней,
+    из базы данных читается при отсутствии в кэше или истечении срока
+
+    Returns:
+        Словарь данных, см. make_disabled_levels_snapshot
+    '''
+
+    snapshot = cache.get(DISABLED_LEVELS_CACHE_KEY)
+    if snapshot is None:
+        snapshot = make_disabled_levels_snapshot()
+    return snapshot
+
+
+def get_disabled_levels() -> list:
+    '''
+    Получение списка отключенных уровней
+
+    Returns:
+        Список уровней
+        [1]
+    '''
+
+    return get_disabled_levels_snapshot()['levels']
+
+
+def get_visible_characters(level: int) -> QuerySet:
+    '''
+    Получение персонажей, доступных на уровне,
+    по таблице видимости characters_visibility
+
+    Args:
+        level: уровень доступа
+
+    Returns:
+        Queryset персонажей в порядке id
+    '''
+
+    return Character.objects.filter(
+        visibilities__access_level=level,
+        visibilities__is_visible=True,
+    ).order_by('id')
+
+
+def get_changed_characters(level: int, since) -> QuerySet:
+    '''
+    Получение персонажей, доступных на уровне, которые изменены
+    или стали доступны начиная с момента since
+
+    Args:
+        level: уровень доступа
+        since: момент времени
+            datetime(2024, 7, 1, 14, 13, 19)
+
+    Returns:
+        Queryset персонажей в порядке id
+    '''
+
+    # условия в одном filter, чтобы использовать одно соединение с видимостью
+    return Character.objects.filter(
+        Q(updated_at__gte=since) | Q(visibilities__updated_at__gte=since),
+        visibilities__access_level=level,
+        visibilities__is_visible=True,
+    ).order_by('id')
+
+
+def get_removed_ids(level: int, since) -> list:
+    '''
+    Получение id персонажей, скрытых или удаленных на уровне
+    начиная с момента since
+
+    Args:
+        level: уровень доступа
+        since: момент времени
+            datetime(2024, 7, 1, 14, 13, 19)
+
+    Returns:
+        Список id
+        [3, 7]
+    '''
+
+    return list(CharacterVisibility.objects.filter(
+        access_level=level,
+        is_visible=False,
+        updated_at__gte=since,
+    ).order_by('character_id').values_list('character_id', flat=True))
+
+
+def filter_characters(characters: QuerySet, filters: dict) -> QuerySet:
+    '''
+    Фильтрация персонажей по диапазонам характеристик и сортировка
+
+    Args:
+        characters: queryset доступных персонажей
+        filters: проверенные параметры фильтрации
+            {
+                "attack_min": 10,
+                "attack_max": 50,
+                "ordering": "-speed"
+            }
+
+    Returns:
+        Queryset персонажей, при равенстве характеристики в порядке id
+    '''
+
+    lookups = {}
+    for stat in CHARACTER_STATS:
+        if filters.get(f'{stat}_min') is not None:
+            lookups[f'{stat}__gte'] = filters[f'{stat}_min']
+        if filters.get(f'{stat}_max') is not None:
+            lookups[f'{stat}__lte'] = filters[f'{stat}_max']
+    characters = characters.filter(**lookups)
+
+    ordering = filters.get('ordering')
+    if ordering is not None:
+        # направление id совпадает с направлением характеристики,
+        # чтобы курсор по паре (характеристика, id) использовал индекс
+        id_ordering = '-id' if ordering.startswith('-') else 'id'
+        characters = characters.order_by(ordering, id_ordering)
+    return characters
+
+
+def seek_characters(characters: QuerySet, ordering: str | None, position: dict) -> QuerySet:
+    '''
+    Отбор персонажей после позиции курсора
+
+    Args:
+        characters: queryset персонажей, отсортированный по ordering
+        ordering: сортировка, None при сортировке по id
+            "-speed"
+        position: позиция курсора
+            {
+                "id": 10,
+                "value": 42
+            }
+
+    Returns:
+        Queryset персонажей после позиции
+    '''
+
+    if ordering is None:
+        return characters.filter(
+            id__gt=position['id'],
+        )
+
+    stat = ordering.lstrip('-')
+    lookup = 'lt' if ordering.startswith('-') else 'gt'
+    return characters.filter(
+        Q(**{f'{stat}__{lookup}': position['value']})
+        | Q(**{stat: position['value'], f'id__{lookup}': position['id']}),
+    )
+
+
+def build_catalog(level: int, stream_threshold: int | None = None) -> dict:
+    '''
+    Сборка готового ответа со списком персонажей уровня
+
+    Args:
+        level: уровень доступа
+        stream_threshold: количество персонажей, больше которого список
+            не собирается в памяти, а отдается потоково без кэширования
+
+    Returns:
+        Словарь данных
+        {
+            "level": 1,
+            "disabled_version": 1720000000000000000,
+            "etag": "9f86d08...",
+            "last_modified": 1720000000,
+            "content": b'{"message":"Успешный успех","data":[]}'
+        }
+        или при потоковой отдаче
+        {
+            "level": 1,
+            "content": <generator>
+        }
+    '''
+
+    logger.info(
+        msg=f'Сборка каталога персонажей уровня {level}',
+    )
+
+    snapshot = get_disabled_levels_snapshot()
+    characters = get_visible_characters(
+        level=level,
+    )
+    encoder = CharacterRowEncoder()
+    rows = characters.values_list(*encoder.columns).iterator(
+        chunk_size=CHARACTERS_STREAMING_CHUNK_SIZE,
+    )
+    if stream_threshold is not None:
+        # первая часть строк показывает, помещается ли список в память
+        head = list(islice(rows, stream_threshold + 1))
+        if len(head) > stream_threshold:
+            logger.info(
+                msg=f'Потоковая отдача каталога персонажей уровня {level}',
+            )
+            return {
+                'level': level,
+                'content': iter_characters_content(
+                    rows=chain(head, rows),
+                    encoder=encoder,
+                ),
+            }
+        rows = head
+    data = encoder.encode(rows)
+    _, response_data = generate_response(
+        status_code=200,
+        data=data,
+    )
+    content = JSONRenderer().render(response_data)
+    etag = hashlib.sha256(content).hexdigest()
+
+    # время изменения сдвигается только при изменении содержимого
+    modified_key = CATALOG_MODIFIED_CACHE_KEY.format(level=level)
+    modified = cache.get(modified_key)
+    if modified is None or modified['etag'] != etag:
+        modified = {
+            'etag': etag,
+            'last_modified': int(time.time()),
+        }
+        cache.set(modified_key, modified, timeout=None)
+
+    catalog = {
+        'level': level,
+        'disabled_version': snapshot['version'],
+        'etag': etag,
+        'last_modified': modified['last_modified'],
+        'content': content,
+    }
+    # срок ограничивает устаревание каталога, если сброс не дошел до процесса
+    cache.set(CATALOG_CACHE_KEY.format(level=level), catalog, timeout=CHARACTERS_CATALOG_TTL)
+    return catalog
+
+
+def get_catalog(level: int, stream_threshold: int | None = None) -> dict:
+    '''
+    Получение готового ответа со списком персонажей уровня,
+    каталог пересобирается при изменении персонажей или отключенных уровней
+
+    Args:
+        level: уровень доступа
+        stream_threshold: порог потоковой отдачи, см. build_catalog
+
+    Returns:
+        Словарь данных, см. build_catalog
+    '''
+
+    catalog = cache.get(CATALOG_CACHE_KEY.format(level=level))
+    if catalog is None or catalog['disabled_version'] != get_disabled_levels_snapshot()['version']:
+        catalog = build_catalog(
+            level=level,
+            stream_threshold=stream_threshold,
+        )
+    return catalog
+
+
+def invalidate_catalogs(levels: list) -> None:
+    '''
+    Сброс каталогов, в которые могут входить персонажи указанных уровней
+
+    Args:
+        levels: уровни измененных персонажей
+            [0, 2]
+    '''
+
+    levels = [level for level in levels if level is not None]
+    if not levels:
+        return
+
+    from_level = min(levels)
+    cache.delete_many([
+        CATALOG_CACHE_KEY.format(level=level)
+        for level, _ in ACCESS_LEVELS
+        if level >= from_level
+    ])
+    bump_characters_version()
+
+
+def get_existing_ids(characters: QuerySet, ids: list) -> set:
+    '''
+    Получение id доступных персонажей из списка частями
+
+    Args:
+        characters: queryset доступных персонажей
+        ids: id персонажей без повторов
+            [3, 1, 2]
+
+    Returns:
+        Множество найденных id
+        {1, 3}
+    '''
+
+    existing_ids = set()
+    for start in range(0, len(ids), CHARACTERS_IDS_CHUNK_SIZE):
+        chunk = ids[start:start + CHARACTERS_IDS_CHUNK_SIZE]
+        existing_ids.update(
+            characters.filter(id__in=chunk).values_list('id', flat=True),
+        )
+    return existing_ids
+
+
+def iter_characters_by_ids(characters: QuerySet, ids: list,
+                           encoder: CharacterRowEncoder) -> Iterator[tuple]:
+    '''
+    Получение строк персонажей по id частями в порядке запроса
+
+    Args:
+        characters: queryset доступных персонажей
+        ids: id персонажей без повторов
+            [3, 1, 2]
+        encoder: кодировщик персонажей, задает колонки строк
+
+    Returns:
+        Итератор строк values_list в колонках encoder.columns
+        (3, "Palladin"), (1, "Dragon")
+    '''
+
+    for start in range(0, len(ids), CHARACTERS_IDS_CHUNK_SIZE):
+        chunk = ids[start:start + CHARACTERS_IDS_CHUNK_SIZE]
+        rows = {
+            encoder.get_id(row): row
+            for row in characters.filter(id__in=chunk).values_list(*encoder.columns)
+        }
+        for character_id in chunk:
+            if character_id in rows:
+                yield rows[character_id]
+
+
+def iter_characters_content(rows: Iterable[tuple], encoder: CharacterRowEncoder,
+                            status_code: int = 200,
+                            missing_ids: list | None = None) -> Iterator[bytes]:
+    '''
+    Построчная сборка ответа со списком персонажей
+
+    Args:
+        rows: строки values_list в колонках encoder.columns,
+            например из .iterator() с серверным курсором
+        encoder: кодировщик персонажей
+        status_code: код статуса для сообщения ответа
+        missing_ids: не найденные id, добавляются в ответ вместе со списком
+
+    Returns:
+        Итератор частей ответа
+        b'{"message":"Успешный успех","data":[', b'{"id":1,...}', b']}'
+    '''
+
+    renderer = JSONRenderer()
+    _, response_data = generate_response(
+        status_code=status_code,
+    )
+
+    message = b'{"message":' + renderer.render(response_data['message'])
+    if missing_ids is None:
+        yield message + b',"data":['
+    else:
+        yield message + b',"data":{"results":['
+
+    chunk = []
+    count = 0
+    try:
+        for row in rows:
+            chunk.append(renderer.render(encoder.to_representation(row)))
+            if len(chunk) == CHARACTERS_STREAMING_CHUNK_SIZE:
+                yield (b',' if count else b'') + b','.join(chunk)
+                count += len(chunk)
+                chunk = []
+    except Exception as exc:
+        # заголовки уже отправлены, соединение обрывается без закрытия JSON,
+        # чтобы клиент не принял часть списка за весь список
+        logger.error(
+            msg=f'Потоковая отдача списка персонажей прервана после {count} строк '
+                f'Ошибки: {exc}',
+        )
+        raise
+    if chunk:
+        yield (b',' if count else b'') + b','.join(chunk)
+
+    if missing_ids is None:
+        yield b']}'
+    else:
+        yield b'],"missing_ids":' + renderer.render(missing_ids) + b'}}'
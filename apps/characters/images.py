@@ -0,0 +1,185 @@
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+
+from PIL import Image
+from django.core.files.base import ContentFile
+
+from characters.models import Character
+
+from utils.images import (
+    IMAGE_FORMATS,
+    encode,
+    open_for_width,
+    resize,
+)
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+VARIANTS_DIR = 'characters/variants'
+# ширина варианта в пикселях, высота пропорциональна оригиналу
+VARIANT_SIZES = {
+    'small': 128,
+    'medium': 256,
+    'large': 512,
+}
+VARIANT_FORMATS = IMAGE_FORMATS
+
+
+def get_storage():
+    return Character._meta.get_field('image').storage
+
+
+def get_variant_name(name: str, size: str, image_format: str) -> str:
+    '''
+    Получение пути варианта изображения, путь вычисляется по оригиналу
+    без обращения к хранилищу
+
+    Args:
+        name: путь оригинала
+            "characters/dragon.png"
+        size: размер варианта
+            "small"
+        image_format: формат варианта
+            "webp"
+
+    Returns:
+        Путь варианта
+        "characters/variants/small/dragon.png.webp"
+    '''
+
+    # имя оригинала сохраняется целиком вместе с расширением,
+    # поэтому разные оригиналы не получают один путь варианта
+    original = name.removeprefix('characters/')
+    extension = VARIANT_FORMATS[image_format][0]
+    return f'{VARIANTS_DIR}/{size}/{original}.{extension}'
+
+
+def get_variant_names(name: str) -> dict:
+    return {
+        size: {
+            image_format: get_variant_name(name, size, image_format)
+            for image_format in VARIANT_FORMATS
+        }
+        for size in VARIANT_SIZES
+    }
+
+
+def make_variants(name: str, force: bool = False) -> int:
+    '''
+    Создание вариантов изображения персонажа всех размеров и форматов,
+    оригинал декодируется один раз
+
+    Args:
+        name: путь оригинала
+            "characters/dragon.png"
+        force: пересоздать существующие варианты
+
+    Returns:
+        Количество созданных файлов
+        6
+    '''
+
+    storage = get_storage()
+    variants = {
+        size: {
+            image_format: variant_name
+            for image_format, variant_name in formats.items()
+            if force or not storage.exists(variant_name)
+        }
+        for size, formats in get_variant_names(name).items()
+    }
+    if not any(variants.values()):
+        return 0
+
+    count = 0
+    with storage.open(name) as file, Image.open(file) as image:
+        image = open_for_width(image, max(VARIANT_SIZES.values()))
+
+        for size, width in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+            if not variants[size]:
+                continue
+            resized = resize(image, width)
+            for image_format, variant_name in variants[size].items():
+                if storage.exists(variant_name):
+                    storage.delete(variant_name)
+                storage.save(variant_name, ContentFile(encode(resized, image_format)))
+                count += 1
+
+    logger.info(
+        msg=f'Созданы варианты изображения {name}: {count}',
+    )
+    return count
+
+
+def delete_variants(name: str) -> int:
+    '''
+    Удаление вариантов изображения персонажа всех размеров и форматов
+
+    Args:
+        name: путь оригинала
+            "characters/dragon.png"
+
+    Returns:
+        Количество удаленных файлов
+        6
+    '''
+
+    storage = get_storage()
+    count = 0
+    for formats in get_variant_names(name).values():
+        for variant_name in formats.values():
+            if storage.exists(variant_name):
+                storage.delete(variant_name)
+                count += 1
+
+    logger.info(
+        msg=f'Удалены варианты изображения {name}: {count}',
+    )
+    return count
+
+
+def _make_variants(name: str | None, previous: str | None) -> int:
+    try:
+        if previous:
+            delete_variants(previous)
+        return make_variants(name) if name else 0
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось обновить варианты изображения {name} '
+                f'Ошибки: {exc}',
+        )
+        return 0
+
+
+# варианты создаются в фоне, чтобы не задерживать ответ на сохранение;
+# пропущенные при перезапуске процесса создает make_character_variants
+variants_executor = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix='character-variants',
+)
+
+
+def submit_variants(name: str | None, previous: str | None = None) -> Future:
+    '''
+    Постановка создания вариантов изображения в фоновую очередь,
+    варианты прежнего изображения удаляются в той же задаче
+
+    Args:
+        name: путь оригинала
+            "characters/dragon.png"
+        previous: путь прежнего оригинала
+            "characters/dog.png"
+
+    Returns:
+        Future с количеством созданных файлов
+    '''
+
+    # изображение может быть общим, его варианты нужны другим персонажам;
+    # проверка выполняется здесь, фоновый поток не обращается к базе данных
+    if previous and Character.objects.filter(image=previous).exists():
+        previous = None
+    return variants_executor.submit(_make_variants, name, previous)
@@ -0,0 +1,130 @@
+from array import array
+from bisect import bisect_right
+
+from django.core.cache import cache
+
+from config.settings import (
+    CHARACTERS_CATALOG_TTL,
+    CHARACTERS_STREAMING_CHUNK_SIZE,
+)
+
+from characters.catalog import (
+    get_characters_version,
+    get_visible_characters,
+)
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+LEADERBOARD_CACHE_KEY = 'characters:leaderboard:{level}:{stat}'
+
+
+def get_sort_key(leaderboard: dict):
+    # по убыванию характеристики, при равенстве по убыванию id,
+    # как при сортировке списка персонажей ordering=-stat
+    ids = leaderboard['ids']
+    values = leaderboard['values']
+    return lambda index: (-values[index], -ids[index])
+
+
+def build_leaderboard(level: int, stat: str) -> dict:
+    '''
+    Сборка отсортированного по характеристике списка id персонажей,
+    доступных на уровне
+
+    Args:
+        level: уровень доступа
+        stat: характеристика
+            "attack"
+
+    Returns:
+        Словарь данных
+        {
+            "version": 1720000000000000000,
+            "ids": array('q', [5, 1]),
+            "values": array('q', [12, 10])
+        }
+    '''
+
+    logger.info(
+        msg=f'Сборка рейтинга персонажей уровня {level} по {stat}',
+    )
+
+    # версия читается до запроса: изменения во время сборки сменят
+    # версию, и рейтинг будет пересобран при следующем чтении
+    leaderboard = {
+        'version': get_characters_version(),
+        'ids': array('q'),
+        'values': array('q'),
+    }
+    rows = get_visible_characters(
+        level=level,
+    ).order_by(f'-{stat}', '-id').values_list('id', stat)
+    for character_id, value in rows.iterator(chunk_size=CHARACTERS_STREAMING_CHUNK_SIZE):
+        leaderboard['ids'].append(character_id)
+        leaderboard['values'].append(value)
+
+    cache.set(
+        LEADERBOARD_CACHE_KEY.format(level=level, stat=stat),
+        leaderboard,
+        timeout=CHARACTERS_CATALOG_TTL,
+    )
+    return leaderboard
+
+
+def get_leaderboard(level: int, stat: str) -> dict:
+    '''
+    Получение рейтинга персонажей уровня по характеристике,
+    рейтинг пересобирается целиком при первом чтении после смены
+    общей версии персонажей
+
+    Args:
+        level: уровень доступа
+        stat: характеристика
+            "attack"
+
+    Returns:
+        Словарь данных, см. build_leaderboard
+    '''
+
+    leaderboard = cache.get(LEADERBOARD_CACHE_KEY.format(level=level, stat=stat))
+    if leaderboard is None or leaderboard['version'] != get_characters_version():
+        leaderboard = build_leaderboard(
+            level=level,
+            stat=stat,
+        )
+    return leaderboard
+
+
+def get_leaderboard_page(leaderboard: dict, limit: int, position: dict | None = None) -> (list, list):
+    '''
+    Получение страницы рейтинга после позиции курсора
+
+    Args:
+        leaderboard: рейтинг, см. build_leaderboard
+        limit: размер страницы
+        position: позиция курсора
+            {
+                "id": 10,
+                "value": 42
+            }
+
+    Returns:
+        Список id и список значений характеристики страницы
+        [5, 1], [12, 10]
+    '''
+
+    start = 0
+    if position is not None:
+        start = bisect_right(
+            range(len(leaderboard['ids'])),
+            (-position['value'], -position['id']),
+            key=get_sort_key(leaderboard),
+        )
+    end = start + limit
+    return (
+        leaderboard['ids'][start:end].tolist(),
+        leaderboard['values'][start:end].tolist(),
+    )
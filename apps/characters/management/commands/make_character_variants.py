@@ -0,0 +1,83 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import connections
+
+from characters.images import make_variants
+from characters.models import Character
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def make_variants_safe(name: str, force: bool) -> (str, int, str | None):
+    try:
+        return name, make_variants(name, force=force), None
+    except Exception as exc:
+        return name, 0, str(exc)
+
+
+class Command(BaseCommand):
+    help = 'Создание вариантов изображений персонажей в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Количество процессов, 1 для работы без пула',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать существующие варианты',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('Количество процессов должно быть больше нуля')
+
+        names = list(Character.objects.exclude(
+            image='',
+        ).exclude(
+            image__isnull=True,
+        ).order_by('image').values_list('image', flat=True).distinct())
+
+        started_at = time.monotonic()
+        make = partial(make_variants_safe, force=options['force'])
+        if options['processes'] == 1:
+            results = map(make, names)
+        else:
+            # дочерние процессы не должны наследовать открытые соединения
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=options['processes'])
+            results = executor.map(make, names, chunksize=16)
+
+        count = 0
+        errors = 0
+        try:
+            for name, created, error in results:
+                count += created
+                if error is not None:
+                    errors += 1
+                    self.stderr.write(f'Не удалось создать варианты {name}: {error}')
+        finally:
+            if options['processes'] != 1:
+                executor.shutdown()
+
+        message = (
+            f'Обработано {len(names)} изображений за {time.monotonic() - started_at:.2f} с, '
+            f'создано вариантов: {count}, ошибок: {errors}'
+        )
+        logger.info(
+            msg=message,
+        )
+        self.stdout.write(message)
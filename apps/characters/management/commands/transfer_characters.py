@@ -0,0 +1,275 @@
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import (
+    Iterable,
+    Iterator,
+)
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from config.settings import (
+    CHARACTERS_IMPORT_BATCH_SIZE,
+    CHARACTERS_STREAMING_CHUNK_SIZE,
+)
+
+from characters.catalog import invalidate_catalogs
+from characters.models import Character
+from characters.serializers import CharacterImportSerializer
+from characters.visibility import sync_visibility
+
+from utils.constants import ACCESS_LEVELS
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+FIELDS = ('name', 'hp', 'attack', 'speed', 'level', 'is_available', 'image')
+FORMATS = ('csv', 'jsonl')
+
+
+class Command(BaseCommand):
+    help = 'Потоковый импорт и экспорт персонажей в CSV и JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['import', 'export'],
+        )
+        parser.add_argument(
+            'path',
+            help='Путь к файлу, "-" для stdin и stdout',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла, по умолчанию по расширению',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=CHARACTERS_IMPORT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or get_format(options['path'])
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля')
+
+        started_at = time.monotonic()
+        if options['action'] == 'import':
+            with open_file(options['path'], 'r') as file:
+                count, errors = import_characters(
+                    rows=read_rows(file, file_format),
+                    batch_size=options['batch_size'],
+                    stderr=self.stderr,
+                )
+        else:
+            with open_file(options['path'], 'w') as file:
+                count = export_characters(
+                    file=file,
+                    file_format=file_format,
+                    chunk_size=options['batch_size'],
+                )
+            errors = 0
+
+        elapsed = time.monotonic() - started_at
+        message = (
+            f'{"Импортировано" if options["action"] == "import" else "Экспортировано"} '
+            f'{count} персонажей за {elapsed:.2f} с '
+            f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+        if errors:
+            message += f', пропущено невалидных строк: {errors}'
+        logger.info(
+            msg=message,
+        )
+        # при экспорте в stdout отчет не должен попасть в данные
+        output = self.stderr if options['path'] == '-' else self.stdout
+        output.write(message)
+
+
+def get_format(path: str) -> str:
+    if path.endswith('.jsonl'):
+        return 'jsonl'
+    if path.endswith('.csv'):
+        return 'csv'
+    raise CommandError(f'Не удалось определить формат файла {path}, укажите --format')
+
+
+@contextmanager
+def open_file(path: str, mode: str):
+    if path == '-':
+        yield sys.stdin if mode == 'r' else sys.stdout
+        return
+
+    with open(path, mode, newline='', encoding='utf-8') as file:
+        yield file
+
+
+def read_rows(file, file_format: str) -> Iterator[dict]:
+    '''
+    Построчное чтение файла без загрузки целиком
+
+    Args:
+        file: открытый файл
+        file_format: формат файла
+            "csv"
+
+    Returns:
+        Итератор словарей строк
+    '''
+
+    if file_format == 'csv':
+        # None выгружается в CSV пустой строкой
+        for row in csv.DictReader(file):
+            yield {key: None if value == '' else value for key, value in row.items()}
+        return
+
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def save_characters(characters: dict) -> None:
+    '''
+    Обновление существующих персонажей по имени и создание новых,
+    уникальность имени частичная, поэтому upsert по конфликту
+    имени недоступен
+
+    Args:
+        characters: новые персонажи по имени
+            {"Dragon": <Character>}
+    '''
+
+    # активный персонаж обновляется, иначе восстанавливается
+    # последний удаленный с тем же именем
+    existing = {}
+    rows = Character.objects.filter(
+        name__in=characters,
+    ).order_by(
+        F('deleted_at').desc(nulls_first=True), '-id',
+    ).values_list('name', 'id')
+    for name, character_id in rows:
+        existing.setdefault(name, character_id)
+
+    now = timezone.now()
+    updated = []
+    created = []
+    for name, character in characters.items():
+        if name in existing:
+            character.pk = existing[name]
+            character.updated_at = now
+            updated.append(character)
+        else:
+            created.append(character)
+
+    Character.objects.bulk_update(
+        updated,
+        fields=[
+            *(field for field in FIELDS if field != 'name'),
+            'updated_at',
+            'deleted_at',
+        ],
+    )
+    Character.objects.bulk_create(created)
+
+
+def import_characters(rows: Iterable[dict], batch_size: int, stderr) -> (int, int):
+    '''
+    Импорт персонажей пачками с обновлением существующих по имени,
+    видимость пересчитывается для каждой пачки, каталоги
+    сбрасываются один раз в конце
+
+    Args:
+        rows: строки персонажей
+            [{"name": "Dragon", "hp": "20", "attack": "10", "speed": "3"}]
+        batch_size: размер пачки
+        stderr: поток для вывода ошибок строк
+
+    Returns:
+        Количество импортированных и пропущенных строк
+        1000, 2
+    '''
+
+    count = 0
+    errors = 0
+    line = 0
+    rows = iter(rows)
+    try:
+        while batch := list(islice(rows, batch_size)):
+            # в пачке остается последняя строка с каждым именем,
+            # иначе upsert дважды затронет одну запись
+            characters = {}
+            for row in batch:
+                line += 1
+                serializer = CharacterImportSerializer(
+                    data=row,
+                )
+                if not serializer.is_valid():
+                    errors += 1
+                    stderr.write(f'Строка {line}: {serializer.errors}')
+                    continue
+                characters[serializer.validated_data['name']] = Character(
+                    **serializer.validated_data,
+                )
+
+            with transaction.atomic():
+                save_characters(characters)
+                sync_visibility(
+                    characters=Character.objects.filter(
+                        name__in=characters,
+                        deleted_at__isnull=True,
+                    ),
+                )
+            count += len(characters)
+    finally:
+        # прежние уровни обновленных персонажей неизвестны,
+        # поэтому сбрасываются каталоги всех уровней
+        invalidate_catalogs(levels=[ACCESS_LEVELS[0][0]])
+
+    return count, errors
+
+
+def export_characters(file, file_format: str, chunk_size: int = CHARACTERS_STREAMING_CHUNK_SIZE) -> int:
+    '''
+    Экспорт персонажей курсором на стороне сервера
+
+    Args:
+        file: открытый файл
+        file_format: формат файла
+            "jsonl"
+        chunk_size: количество строк, читаемых из курсора за раз
+
+    Returns:
+        Количество экспортированных строк
+        1000
+    '''
+
+    rows = Character.objects.filter(
+        deleted_at__isnull=True,
+    ).order_by('id').values_list(*FIELDS).iterator(
+        chunk_size=chunk_size,
+    )
+    count = 0
+    if file_format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            file.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False))
+            file.write('\n')
+            count += 1
+    return count
@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-17 10:00
+
+import hashlib
+import uuid
+
+from django.db import migrations, models
+
+
+def dedupe_keys(apps, schema_editor):
+    # поиск ключа брал запись с меньшим id, остальные копии были
+    # недоступны: они получают новый ключ, чтобы хэш стал уникальным,
+    # флаг activated не меняется, иначе отключился бы уровень доступа
+    CharactersAPIKey = apps.get_model('characters', 'CharactersAPIKey')
+    duplicates = CharactersAPIKey.objects.values('key').annotate(
+        count=models.Count('id'),
+    ).filter(count__gt=1).values_list('key', flat=True)
+    for key in list(duplicates):
+        ids = CharactersAPIKey.objects.filter(key=key).order_by('id').values_list('id', flat=True)
+        for api_key_id in list(ids)[1:]:
+            CharactersAPIKey.objects.filter(id=api_key_id).update(
+                key=str(uuid.uuid4()),
+            )
+
+
+def fill_key_digest(apps, schema_editor):
+    CharactersAPIKey = apps.get_model('characters', 'CharactersAPIKey')
+    keys = CharactersAPIKey.objects.only('id', 'key')
+    for api_key in keys.iterator():
+        api_key.key_digest = hashlib.sha256(api_key.key.encode()).hexdigest()
+        api_key.save(update_fields=['key_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0005_remove_charactersapikey_on_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='charactersapikey',
+            name='key_digest',
+            field=models.CharField(editable=False, max_length=64, null=True, verbose_name='Хэш ключа'),
+        ),
+        migrations.RunPython(dedupe_keys, migrations.RunPython.noop),
+        migrations.RunPython(fill_key_digest, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='charactersapikey',
+            name='key_digest',
+            field=models.CharField(editable=False, max_length=64, unique=True, verbose_name='Хэш ключа'),
+        ),
+    ]
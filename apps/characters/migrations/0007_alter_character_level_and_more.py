@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0006_charactersapikey_key_digest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='character',
+            name='level',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Бесплатный'), (1, 'Базовый'), (2, 'Продвинутый'), (3, 'Премиум')], default=0, null=True, verbose_name='Уровень доступа'),
+        ),
+        migrations.AlterField(
+            model_name='charactersapikey',
+            name='access_level',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Бесплатный'), (1, 'Базовый'), (2, 'Продвинутый'), (3, 'Премиум')], default=0, null=True, verbose_name='Уровень доступа'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['is_available', 'level', 'id'], name='characters_visibility_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-17 00:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from utils.constants import ACCESS_LEVELS
+
+
+def fill_visibility(apps, schema_editor):
+    Character = apps.get_model('characters', 'Character')
+    CharactersAPIKey = apps.get_model('characters', 'CharactersAPIKey')
+    CharacterVisibility = apps.get_model('characters', 'CharacterVisibility')
+
+    disabled_levels = set(CharactersAPIKey.objects.filter(
+        activated=False,
+    ).values_list('access_level', flat=True))
+    characters = Character.objects.filter(
+        is_available=True,
+        level__isnull=False,
+    ).exclude(
+        level__in=disabled_levels,
+    ).values_list('id', 'level')
+
+    CharacterVisibility.objects.bulk_create(
+        (
+            CharacterVisibility(access_level=access_level, character_id=character_id)
+            for character_id, level in characters.iterator()
+            for access_level, _ in ACCESS_LEVELS
+            if access_level >= level
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0007_alter_character_level_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CharacterVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('access_level', models.PositiveSmallIntegerField(choices=[(0, 'Бесплатный'), (1, 'Базовый'), (2, 'Продвинутый'), (3, 'Премиум')], verbose_name='Уровень доступа')),
+                ('character', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibilities', to='characters.character', verbose_name='Персонаж')),
+            ],
+            options={
+                'verbose_name': 'Видимость персонажа',
+                'verbose_name_plural': 'Видимость персонажей',
+                'db_table': 'characters_visibility',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='charactervisibility',
+            constraint=models.UniqueConstraint(fields=('access_level', 'character'), name='characters_visibility_unique'),
+        ),
+        migrations.RunPython(fill_visibility, migrations.RunPython.noop),
+    ]
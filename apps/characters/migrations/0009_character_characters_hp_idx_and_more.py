@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0008_charactervisibility_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['hp', 'id'], name='characters_hp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['attack', 'id'], name='characters_attack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['speed', 'id'], name='characters_speed_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-17 02:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0009_character_characters_hp_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='charactervisibility',
+            name='is_visible',
+            field=models.BooleanField(default=True, verbose_name='Виден'),
+        ),
+        migrations.AddField(
+            model_name='charactervisibility',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='charactervisibility',
+            index=models.Index(fields=['access_level', 'updated_at'], name='characters_visibility_upd_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0010_character_updated_at_deleted_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='character',
+            name='name',
+            field=models.CharField(max_length=256, verbose_name='Имя'),
+        ),
+        migrations.AddConstraint(
+            model_name='character',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('name',), name='characters_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+def dedupe_levels(apps, schema_editor):
+    # выдавался ключ с меньшим id, остальные ключи уровня удаляются;
+    # отключенная копия отключала уровень, поэтому флаг переносится на оставшийся ключ
+    CharactersAPIKey = apps.get_model('characters', 'CharactersAPIKey')
+    duplicates = CharactersAPIKey.objects.exclude(access_level=None).values('access_level').annotate(
+        count=models.Count('id'),
+    ).filter(count__gt=1).values_list('access_level', flat=True)
+    for level in list(duplicates):
+        keys = CharactersAPIKey.objects.filter(access_level=level).order_by('id')
+        first = keys.first()
+        if keys.filter(activated=False).exists():
+            CharactersAPIKey.objects.filter(id=first.id).update(activated=False)
+        keys.exclude(id=first.id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0011_character_name_uniq'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_levels, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='charactersapikey',
+            constraint=models.UniqueConstraint(fields=('access_level',), name='characters_api_keys_level_uniq'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-17 01:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0012_charactersapikey_level_uniq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='charactervisibility',
+            name='character',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='visibilities', to='characters.character', verbose_name='Персонаж'),
+        ),
+    ]
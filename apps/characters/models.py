@@ -1,15 +1,49 @@
+import hashlib
 import uuid
 
-from django.db import models
+from django.db import (
+    models,
+    transaction,
+)
+from django.utils import timezone
 
 from utils.constants import ACCESS_LEVELS
 
 
+class CharacterQuerySet(models.QuerySet):
+    def delete(self):
+        # удаление мягкое, как и у отдельного персонажа; update не отправляет
+        # сигналы, поэтому видимость и каталоги обновляются явно
+        from characters.visibility import update_characters
+
+        count = update_characters(
+            characters=self.filter(deleted_at__isnull=True),
+            deleted_at=timezone.now(),
+        )
+        return count, {self.model._meta.label: count}
+
+    delete.queryset_only = True
+
+    def hard_delete(self):
+        # строки видимости не удаляются каскадно: перед удалением они
+        # скрываются и остаются отметкой удаления для синхронизации изменений
+        from characters.visibility import update_characters
+
+        with transaction.atomic():
+            ids = list(self.values_list('id', flat=True))
+            update_characters(
+                characters=self.model.objects.filter(id__in=ids, deleted_at__isnull=True),
+                deleted_at=timezone.now(),
+            )
+            return super(CharacterQuerySet, self.model.objects.filter(id__in=ids)).delete()
+
+    hard_delete.queryset_only = True
+
+
 class Character(models.Model):
     name = models.CharField(
         verbose_name='Имя',
         max_length=256,
-        unique=True,
     )
     hp = models.PositiveIntegerField(
         verbose_name='Здоровье',
@@ -26,9 +60,8 @@ class Character(models.Model):
         null=True,
         blank=True,
     )
-    level = models.CharField(
+    level = models.PositiveSmallIntegerField(
         verbose_name='Уровень доступа',
-        max_length=64,
         null=True,
         choices=ACCESS_LEVELS,
         default=ACCESS_LEVELS[0][0],
@@ -41,14 +74,62 @@ class Character(models.Model):
         verbose_name='Дата создания',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        null=True,
+        blank=True,
+    )
+
+    objects = CharacterQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def delete(self, using=None, keep_parents=False):
+        # удаление мягкое, чтобы клиенты синхронизации получили удаление
+        self.deleted_at = timezone.now()
+        self.save(using=using)
+        return 1, {self._meta.label: 1}
+
+    def hard_delete(self, using=None, keep_parents=False):
+        return type(self).objects.using(using).filter(pk=self.pk).hard_delete()
+
     class Meta:
         db_table = 'characters'
         verbose_name = 'Персонаж'
         verbose_name_plural = 'Персонажи'
+        constraints = [
+            # имя удаленного персонажа можно занять заново
+            models.UniqueConstraint(
+                fields=['name'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='characters_name_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['is_available', 'level', 'id'],
+                name='characters_visibility_idx',
+            ),
+            # диапазонные фильтры и курсоры по паре (характеристика, id)
+            models.Index(
+                fields=['hp', 'id'],
+                name='characters_hp_idx',
+            ),
+            models.Index(
+                fields=['attack', 'id'],
+                name='characters_attack_idx',
+            ),
+            models.Index(
+                fields=['speed', 'id'],
+                name='characters_speed_idx',
+            ),
+        ]
 
 
 class CharactersAPIKey(models.Model):
@@ -56,9 +137,14 @@ class CharactersAPIKey(models.Model):
         verbose_name='Ключ',
         max_length=64,
     )
-    access_level = models.CharField(
-        verbose_name='Уровень доступа',
+    key_digest = models.CharField(
+        verbose_name='Хэш ключа',
         max_length=64,
+        unique=True,
+        editable=False,
+    )
+    access_level = models.PositiveSmallIntegerField(
+        verbose_name='Уровень доступа',
         null=True,
         choices=ACCESS_LEVELS,
         default=ACCESS_LEVELS[0][0],
@@ -79,11 +165,69 @@ class CharactersAPIKey(models.Model):
         db_table = 'characters_api_keys'
         verbose_name = 'API ключ персонажей'
         verbose_name_plural = 'API ключи персонажей'
+        constraints = [
+            # ключ уровня выдается всем пользователям уровня, поэтому
+            # параллельная выдача не должна создать второй ключ
+            models.UniqueConstraint(
+                fields=['access_level'],
+                name='characters_api_keys_level_uniq',
+            ),
+        ]
 
     def _make_key(self):
         return str(uuid.uuid4())
 
+    @staticmethod
+    def make_digest(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
     def save(self, *args, **kwargs):
         if not self.key:
             self.key = self._make_key()
+        self.key_digest = self.make_digest(self.key)
         return super().save(*args, **kwargs)
+
+
+class CharacterVisibility(models.Model):
+    access_level = models.PositiveSmallIntegerField(
+        verbose_name='Уровень доступа',
+        choices=ACCESS_LEVELS,
+    )
+    # строка переживает полное удаление персонажа, чтобы лента изменений
+    # вернула его id в removed, поэтому ограничение внешнего ключа снято
+    character = models.ForeignKey(
+        Character,
+        verbose_name='Персонаж',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='visibilities',
+    )
+    # строка скрытого персонажа остается для синхронизации изменений
+    is_visible = models.BooleanField(
+        verbose_name='Виден',
+        default=True,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return f'{self.access_level} {self.character_id}'
+
+    class Meta:
+        db_table = 'characters_visibility'
+        verbose_name = 'Видимость персонажа'
+        verbose_name_plural = 'Видимость персонажей'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['access_level', 'character'],
+                name='characters_visibility_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['access_level', 'updated_at'],
+                name='characters_visibility_upd_idx',
+            ),
+        ]
@@ -1,9 +1,36 @@
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 
+from config.settings import CHARACTERS_PAGE_MAX_LIMIT
+
+from characters.images import get_variant_names
 from characters.models import Character
 
+from utils.constants import (
+    ACCESS_LEVELS,
+    CHARACTER_STATS,
+)
+from utils.pagination import decode_cursor
+
 
 class CharacterSerializer(serializers.ModelSerializer):
+    # уровень хранится числом, в ответе остается строкой
+    level = serializers.CharField(
+        read_only=True,
+    )
+    image_variants = serializers.SerializerMethodField()
+
+    # варианты изображения отдаются только по запросу в fields
+    default_fields = [
+        'id',
+        'name',
+        'image',
+        'hp',
+        'attack',
+        'speed',
+        'level',
+    ]
 
     class Meta:
         model = Character
@@ -11,14 +38,241 @@ class CharacterSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'hp',
             'attack',
             'speed',
             'level',
         ]
 
+    def __init__(self, *args, fields: list | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = fields or self.default_fields
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+
+    def get_image_variants(self, instance):
+        if not instance.image:
+            return None
+        storage = instance.image.storage
+        request = self.context.get('request')
+        variants = {}
+        for size, formats in get_variant_names(instance.image.name).items():
+            variants[size] = {}
+            for image_format, name in formats.items():
+                url = storage.url(name)
+                variants[size][image_format] = request.build_absolute_uri(url) if request else url
+        return variants
+
+
+class CharacterRowEncoder:
+    '''
+    Кодирование персонажей из кортежей values_list без ModelSerializer,
+    результат совпадает с CharacterSerializer без request в контексте
+    '''
+
+    def __init__(self, fields: list | None = None, extra_columns: list | None = None):
+        self.fields = fields or CharacterSerializer.default_fields
+        # колонки сверх полей ответа нужны для курсоров и вариантов
+        # изображения и не попадают в ответ
+        self.columns = [field for field in self.fields if field != 'image_variants']
+        self.hidden_columns = []
+        extra_columns = ['id', *(extra_columns or [])]
+        if 'image_variants' in self.fields:
+            extra_columns.append('image')
+        for column in extra_columns:
+            if column not in self.columns:
+                self.columns.append(column)
+                self.hidden_columns.append(column)
+        self.id_index = self.columns.index('id')
+        self.image_index = self.columns.index('image') if 'image' in self.columns else None
+        self.level_index = self.columns.index('level') if 'level' in self.columns else None
+        self.with_variants = 'image_variants' in self.fields
+
+        storage = Character._meta.get_field('image').storage
+        self.storage = storage
+        # для файлового хранилища url это base_url и путь к файлу
+        self.media_url = storage.base_url if isinstance(storage, FileSystemStorage) else None
+
+    def get_image_url(self, name: str | None) -> str | None:
+        if not name:
+            return None
+        if self.media_url is None:
+            return self.storage.url(name)
+        return self.media_url + filepath_to_uri(name).lstrip('/')
+
+    def get_image_variants(self, name: str | None) -> dict | None:
+        if not name:
+            return None
+        return {
+            size: {
+                image_format: self.get_image_url(variant_name)
+                for image_format, variant_name in formats.items()
+            }
+            for size, formats in get_variant_names(name).items()
+        }
+
+    def get_id(self, row: tuple) -> int:
+        return row[self.id_index]
+
+    def get_column(self, row: tuple, column: str):
+        return row[self.columns.index(column)]
+
+    def to_representation(self, row: tuple) -> dict:
+        data = dict(zip(self.columns, row))
+        if self.image_index is not None:
+            data['image'] = self.get_image_url(row[self.image_index])
+        if self.level_index is not None and row[self.level_index] is not None:
+            data['level'] = str(row[self.level_index])
+        if self.with_variants:
+            data['image_variants'] = self.get_image_variants(row[self.image_index])
+            # порядок полей как в CharacterSerializer, без скрытых колонок
+            return {field: data[field] for field in self.fields}
+        for column in self.hidden_columns:
+            del data[column]
+        return data
+
+    def encode(self, rows) -> list:
+        return [self.to_representation(row) for row in rows]
+
 
 class CharacterIDSerializer(serializers.Serializer):
     characters_ids = serializers.ListField(
         child=serializers.IntegerField(min_value=1)
     )
+
+
+class CharacterImportSerializer(serializers.Serializer):
+    name = serializers.CharField(
+        max_length=256,
+    )
+    hp = serializers.IntegerField(
+        min_value=0,
+    )
+    attack = serializers.IntegerField(
+        min_value=0,
+    )
+    speed = serializers.IntegerField(
+        min_value=0,
+    )
+    # персонажи без уровня выгружаются экспортом и должны загружаться обратно
+    level = serializers.ChoiceField(
+        choices=ACCESS_LEVELS,
+        allow_null=True,
+        default=ACCESS_LEVELS[0][0],
+    )
+    is_available = serializers.BooleanField(
+        default=True,
+    )
+    image = serializers.CharField(
+        max_length=100,
+        allow_blank=True,
+        allow_null=True,
+        default='',
+    )
+
+
+class CharacterPageSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=CHARACTERS_PAGE_MAX_LIMIT,
+        default=CHARACTERS_PAGE_MAX_LIMIT,
+    )
+    cursor = serializers.CharField(
+        required=False,
+    )
+
+    def validate_cursor(self, value):
+        try:
+            position = decode_cursor(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+        if not isinstance(position.get('id'), int):
+            raise serializers.ValidationError(
+                "Невалидный курсор"
+            )
+        if 'ordering' in position and not isinstance(position.get('value'), int):
+            raise serializers.ValidationError(
+                "Невалидный курсор"
+            )
+        return position
+
+
+class CharacterFieldsSerializer(serializers.Serializer):
+    fields = serializers.CharField(
+        required=False,
+    )
+
+    def validate_fields(self, value):
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = set(fields) - set(CharacterSerializer.Meta.fields)
+        if not fields or unknown:
+            raise serializers.ValidationError(
+                f"Неизвестные поля: {', '.join(sorted(unknown))}"
+            )
+        # порядок полей в ответе как в CharacterSerializer
+        return [name for name in CharacterSerializer.Meta.fields if name in fields]
+
+
+class CharacterFilterSerializer(serializers.Serializer):
+    hp_min = serializers.IntegerField(
+        min_value=0,
+        required=False,
+    )
+    hp_max = serializers.IntegerField(
+        min_value=0,
+        required=False,
+    )
+    attack_min = serializers.IntegerField(
+        min_value=0,
+        required=False,
+    )
+    attack_max = serializers.IntegerField(
+        min_value=0,
+        required=False,
+    )
+    speed_min = serializers.IntegerField(
+        min_value=0,
+        required=False,
+    )
+    speed_max = serializers.IntegerField(
+        min_value=0,
+        required=False,
+    )
+    ordering = serializers.ChoiceField(
+        choices=[
+            ordering
+            for stat in CHARACTER_STATS
+            for ordering in (stat, f'-{stat}')
+        ],
+        required=False,
+    )
+
+    def validate(self, attrs):
+        for stat in CHARACTER_STATS:
+            stat_min = attrs.get(f'{stat}_min')
+            stat_max = attrs.get(f'{stat}_max')
+            if stat_min is not None and stat_max is not None and stat_min > stat_max:
+                raise serializers.ValidationError(
+                    f"Минимум {stat} больше максимума"
+                )
+        return attrs
+
+
+class CharacterChangesSerializer(serializers.Serializer):
+    since = serializers.CharField(
+        required=False,
+    )
+
+    def validate_since(self, value):
+        try:
+            version = decode_cursor(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+        if not isinstance(version.get('level'), int) or not isinstance(version.get('time'), int):
+            raise serializers.ValidationError(
+                "Невалидная версия"
+            )
+        return version
@@ -1,22 +1,97 @@
+import time
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from itertools import (
+    chain,
+    islice,
+)
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.http import QueryDict
 
-from characters.models import (
-    CharactersAPIKey,
-    Character,
+from config.settings import (
+    CHARACTERS_API_KEY_CACHE_SIZE,
+    CHARACTERS_API_KEY_CACHE_TTL,
+    CHARACTERS_CHANGES_OVERLAP,
+    CHARACTERS_STREAMING_CHUNK_SIZE,
+    CHARACTERS_STREAMING_THRESHOLD,
 )
+
+from characters.catalog import (
+    filter_characters,
+    get_catalog,
+    get_changed_characters,
+    get_characters_validators,
+    get_existing_ids,
+    get_removed_ids,
+    get_visible_characters,
+    iter_characters_by_ids,
+    iter_characters_content,
+    seek_characters,
+)
+from characters.leaderboards import (
+    get_leaderboard,
+    get_leaderboard_page,
+)
+from characters.models import CharactersAPIKey
+from characters.stats import get_stats
+from characters.store import get_store
 from characters.serializers import (
-    CharacterSerializer,
+    CharacterRowEncoder,
+    CharacterChangesSerializer,
     CharacterIDSerializer,
+    CharacterPageSerializer,
+    CharacterFieldsSerializer,
+    CharacterFilterSerializer,
 )
 
-from utils.constants import ACCESS_LEVELS
+from utils.cache import (
+    TTLCache,
+    is_shared_cache,
+)
+from utils.constants import (
+    ACCESS_LEVELS,
+    CHARACTER_STATS,
+)
 from utils.logger import get_logger
+from utils.pagination import encode_cursor
 from utils.response_patterns import generate_response
 
 logger = get_logger(__name__)
 User = get_user_model()
 
+API_KEYS_VERSION_CACHE_KEY = 'characters:api_keys:version'
+
+# уровни по хэшу ключа вместе с общей версией ключей на момент чтения
+api_key_cache = TTLCache(
+    max_size=CHARACTERS_API_KEY_CACHE_SIZE,
+    ttl=CHARACTERS_API_KEY_CACHE_TTL,
+)
+
+
+def get_api_keys_version() -> int:
+    '''
+    Получение общей версии API ключей, версия меняется
+    при любом изменении ключей в любом процессе
+
+    Returns:
+        Версия
+        1720000000000000000
+    '''
+
+    # после потери ключа версия начинается с нового значения
+    cache.add(API_KEYS_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+    return cache.get(API_KEYS_VERSION_CACHE_KEY)
+
+
+def bump_api_keys_version() -> None:
+    cache.set(API_KEYS_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+    api_key_cache.clear()
+
 
 def get_key(user: User) -> (int, dict):
     '''
@@ -41,8 +116,10 @@ def get_key(user: User) -> (int, dict):
     )
 
     try:
+        # уровень уникален: при параллельной выдаче get_or_create ловит
+        # IntegrityError и возвращает ключ, созданный другим запросом
         api_key, _ = CharactersAPIKey.objects.get_or_create(
-            access_level=user.level
+            access_level=user.level,
         )
     except Exception as exc:
         logger.error(
@@ -65,7 +142,7 @@ def get_key(user: User) -> (int, dict):
     )
 
 
-def get_level(api_key: str) -> (int, str):
+def get_level(api_key: str) -> (int, int):
     '''
     Получение уровня
 
@@ -74,7 +151,7 @@ def get_level(api_key: str) -> (int, str):
 
     Returns:
         Код статуса и уровень
-        200, '0'
+        200, 0
     '''
 
     logger.info(
@@ -87,36 +164,123 @@ def get_level(api_key: str) -> (int, str):
         )
         return 200, ACCESS_LEVELS[0][0]
 
-    try:
-        key = CharactersAPIKey.objects.filter(
-            key=api_key,
-        ).first()
-    except Exception as exc:
-        logger.error(
-            msg=f'Не удалось найти API ключ персонажей '
-                f'Ошибки: {exc}',
-        )
-        return 500, '0'
+    # в кэше и в индексе хранится только хэш ключа
+    key_digest = CharactersAPIKey.make_digest(api_key)
+    # без общего кэша процесс не узнает об изменении ключа
+    # в другом процессе, поэтому ключ каждый раз ищется в базе данных
+    version = get_api_keys_version() if is_shared_cache() else None
+    found, entry = api_key_cache.get(key_digest) if version is not None else (False, None)
+    if found and entry[0] == version:
+        level = entry[1]
+    else:
+        try:
+            key = CharactersAPIKey.objects.filter(
+                key_digest=key_digest,
+            ).first()
+        except Exception as exc:
+            logger.error(
+                msg=f'Не удалось найти API ключ персонажей '
+                    f'Ошибки: {exc}',
+            )
+            return 500, ACCESS_LEVELS[0][0]
+
+        level = key.access_level if key is not None else None
+        if version is not None:
+            api_key_cache.set(key_digest, (version, level))
 
-    if key is None:
+    if level is None:
         logger.error(
             msg='API ключ персонажей не найден',
         )
-        return 404, '0'
+        return 404, ACCESS_LEVELS[0][0]
 
-    level = key.access_level
     logger.info(
         msg=f'Уровень {level} по API ключу персонажей получен',
     )
     return 200, level
 
 
-def get_characters_by_level(api_key: str) -> (int, dict):
+def get_fields(params: QueryDict | None) -> (int, list | None):
+    '''
+    Получение списка полей персонажа для ответа
+
+    Args:
+        params: параметры запроса
+            {
+                "fields": "id,name,level"
+            }
+
+    Returns:
+        Код статуса и список полей, None если выбраны все поля
+        200, ["id", "name", "level"]
+    '''
+
+    if not params or 'fields' not in params:
+        return 200, None
+
+    serializer = CharacterFieldsSerializer(
+        data=params,
+    )
+    if not serializer.is_valid():
+        logger.error(
+            msg=f'Невалидные поля персонажей {params} '
+                f'Ошибки: {serializer.errors}',
+        )
+        return 400, None
+
+    return 200, serializer.validated_data['fields']
+
+
+def get_filters(params: QueryDict | None) -> (int, dict):
+    '''
+    Получение фильтров по характеристикам и сортировки персонажей
+
+    Args:
+        params: параметры запроса
+            {
+                "attack_min": 10,
+                "attack_max": 50,
+                "ordering": "-speed"
+            }
+
+    Returns:
+        Код статуса и словарь фильтров, пустой если фильтры не заданы
+        200, {"attack_min": 10, "attack_max": 50, "ordering": "-speed"}
+    '''
+
+    serializer = CharacterFilterSerializer(
+        data=params or {},
+    )
+    if not params or not set(serializer.fields) & set(params):
+        return 200, {}
+
+    if not serializer.is_valid():
+        logger.error(
+            msg=f'Невалидные фильтры персонажей {params} '
+                f'Ошибки: {serializer.errors}',
+        )
+        return 400, {}
+
+    return 200, serializer.validated_data
+
+
+def get_characters_by_level(api_key: str, params: QueryDict | None = None) -> (int, dict):
     '''
     Получение списка персонажей по уровню
 
     Args:
         api_key: API ключ
+        params: параметры постраничного вывода, выбора полей,
+            фильтрации и сортировки по характеристикам,
+            без limit и cursor возвращается весь список
+            {
+                "limit": 100,
+                "cursor": "eyJpZCI6MTB9",
+                "fields": "id,name,level",
+                "attack_min": 10,
+                "attack_max": 50,
+                "ordering": "-speed"
+            }
 
     Returns:
         Код статуса и словарь данных
@@ -125,11 +289,63 @@ def get_characters_by_level(api_key: str) -> (int, dict):
             "message": "Успех",
             "data": []
         }
+        или при постраничном выводе
+        200,
+        {
+            "message": "Успех",
+            "data": {
+                "results": [],
+                "next_cursor": "eyJpZCI6MjB9"
+            }
+        }
+        или итератор частей ответа, если персонажей
+        больше CHARACTERS_STREAMING_THRESHOLD
+        200, <generator>
     '''
 
     logger.info(
-        msg='Получение списка персонажей по API ключу персонажей',
+        msg=f'Получение списка персонажей по API ключу персонажей с параметрами {params}',
+    )
+
+    page = None
+    if params and ('limit' in params or 'cursor' in params):
+        serializer = CharacterPageSerializer(
+            data=params,
+        )
+        if not serializer.is_valid():
+            logger.error(
+                msg=f'Невалидные параметры для получения списка персонажей {params} '
+                    f'Ошибки: {serializer.errors}',
+            )
+            return generate_response(
+                status_code=400,
+            )
+        page = serializer.validated_data
+
+    status_code, fields = get_fields(
+        params=params,
+    )
+    if status_code != 200:
+        return generate_response(
+            status_code=status_code,
+        )
+
+    status_code, filters = get_filters(
+        params=params,
     )
+    if status_code != 200:
+        return generate_response(
+            status_code=status_code,
+        )
+
+    ordering = filters.get('ordering')
+    if page is not None and 'cursor' in page and page['cursor'].get('ordering') != ordering:
+        logger.error(
+            msg=f'Курсор не соответствует сортировке {ordering}',
+        )
+        return generate_response(
+            status_code=400,
+        )
 
     status_code, level = get_level(
         api_key=api_key,
@@ -142,17 +358,53 @@ def get_characters_by_level(api_key: str) -> (int, dict):
             status_code=status_code,
         )
 
+    stat = ordering.lstrip('-') if ordering else None
+    encoder = CharacterRowEncoder(
+        fields=fields,
+        extra_columns=[stat] if stat else None,
+    )
     try:
-        levels = CharactersAPIKey.objects.filter(
-            activated=False,
-        ).values_list('access_level', flat=True)
-
-        characters = Character.objects.filter(
-            level__lte=level,
-            is_available=True,
-        ).exclude(
-            level__in=list(levels),
+        # без фильтров список читается из хранилища в памяти, если оно включено
+        store = None if filters else get_store()
+        characters = filter_characters(
+            characters=get_visible_characters(
+                level=level,
+            ),
+            filters=filters,
         )
+        stream = False
+        if store is not None:
+            if page is None:
+                stream = store.count(level) > CHARACTERS_STREAMING_THRESHOLD
+                if not stream:
+                    rows = list(store.iter_rows(level, encoder.columns))
+            else:
+                rows = list(islice(
+                    store.iter_rows(level, encoder.columns, page.get('cursor', {}).get('id')),
+                    page['limit'] + 1,
+                ))
+        elif page is None:
+            # запрос начинается здесь, чтобы ошибка базы данных вернула 500,
+            # а не оборванный ответ 200; первая часть строк показывает,
+            # нужна ли потоковая отдача, без отдельного подсчета
+            rows = characters.values_list(*encoder.columns).iterator(
+                chunk_size=CHARACTERS_STREAMING_CHUNK_SIZE,
+            )
+            head = list(islice(rows, CHARACTERS_STREAMING_THRESHOLD + 1))
+            stream = len(head) > CHARACTERS_STREAMING_THRESHOLD
+            if stream:
+                rows = chain(head, rows)
+            else:
+                rows = head
+        else:
+            if 'cursor' in page:
+                characters = seek_characters(
+                    characters=characters,
+                    ordering=ordering,
+                    position=page['cursor'],
+                )
+            # лишняя запись показывает, есть ли следующая страница
+            rows = list(characters.values_list(*encoder.columns)[:page['limit'] + 1])
     except Exception as exc:
         logger.error(
             msg=f'Не удалось получить список персонажей уровня {level} '
@@ -162,10 +414,32 @@ def get_characters_by_level(api_key: str) -> (int, dict):
             status_code=500,
         )
 
-    response_data = CharacterSerializer(
-        instance=characters,
-        many=True,
-    ).data
+    if stream:
+        logger.info(
+            msg=f'Потоковая отдача списка персонажей уровня {level}',
+        )
+        if store is not None:
+            rows = store.iter_rows(level, encoder.columns)
+        return 200, iter_characters_content(
+            rows=rows,
+            encoder=encoder,
+        )
+
+    if page is None:
+        response_data = encoder.encode(rows)
+    else:
+        next_cursor = None
+        if len(rows) > page['limit']:
+            rows = rows[:page['limit']]
+            position = {'id': encoder.get_id(rows[-1])}
+            if ordering is not None:
+                position['ordering'] = ordering
+                position['value'] = encoder.get_column(rows[-1], stat)
+            next_cursor = encode_cursor(position)
+        response_data = {
+            'results': encoder.encode(rows),
+            'next_cursor': next_cursor,
+        }
     logger.info(
         msg=f'Список персонажей {response_data} по API ключу персонажей получен',
     )
@@ -175,7 +449,477 @@ def get_characters_by_level(api_key: str) -> (int, dict):
     )
 
 
-def get_characters_by_ids(api_key: str, data: QueryDict) -> (int, dict):
+def get_changes_by_level(api_key: str, params: QueryDict | None = None) -> (int, dict):
+    '''
+    Получение изменений списка персонажей по уровню с версии клиента
+
+    Args:
+        api_key: API ключ
+        params: версия из предыдущего ответа и поля персонажей,
+            без версии или при смене уровня возвращается весь список
+            {
+                "since": "eyJsZXZlbCI6MSwidGltZSI6MTcyMDAwMDAwMDAwMDAwMH0",
+                "fields": "id,name"
+            }
+
+    Returns:
+        Код статуса и словарь данных
+        200,
+        {
+            "message": "Успех",
+            "data": {
+                "full": false,
+                "updated": [],
+                "removed": [3],
+                "version": "eyJsZXZlbCI6MSwidGltZSI6MTcyMDAwMDAwNTAwMDAwMH0"
+            }
+        }
+    '''
+
+    logger.info(
+        msg=f'Получение изменений списка персонажей с параметрами {params}',
+    )
+
+    serializer = CharacterChangesSerializer(
+        data=params or {},
+    )
+    if not serializer.is_valid():
+        logger.error(
+            msg=f'Невалидные параметры для получения изменений персонажей {params} '
+                f'Ошибки: {serializer.errors}',
+        )
+        return generate_response(
+            status_code=400,
+        )
+    version = serializer.validated_data.get('since')
+
+    status_code, fields = get_fields(
+        params=params,
+    )
+    if status_code != 200:
+        return generate_response(
+            status_code=status_code,
+        )
+
+    status_code, level = get_level(
+        api_key=api_key,
+    )
+    if status_code != 200:
+        logger.error(
+            msg='Не удалось получить изменения персонажей по API ключу персонажей',
+        )
+        return generate_response(
+            status_code=status_code,
+        )
+
+    # новая версия берется до чтения и с запасом на незавершенные транзакции,
+    # поэтому изменение может прийти повторно, но не потеряется
+    now = datetime.now(tz=timezone.utc) - timedelta(seconds=CHARACTERS_CHANGES_OVERLAP)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    full = version is None or version['level'] != level
+
+    encoder = CharacterRowEncoder(
+        fields=fields,
+    )
+    try:
+        if full:
+            characters = get_visible_characters(
+                level=level,
+            )
+            removed_ids = []
+        else:
+            since = epoch + timedelta(microseconds=version['time'])
+            characters = get_changed_characters(
+                level=level,
+                since=since,
+            )
+            removed_ids = get_removed_ids(
+                level=level,
+                since=since,
+            )
+        rows = list(characters.values_list(*encoder.columns))
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось получить изменения персонажей уровня {level} '
+                f'Ошибки: {exc}',
+        )
+        return generate_response(
+            status_code=500,
+        )
+
+    response_data = {
+        'full': full,
+        'updated': encoder.encode(rows),
+        'removed': removed_ids,
+        'version': encode_cursor({
+            'level': level,
+            'time': (now - epoch) // timedelta(microseconds=1),
+        }),
+    }
+    logger.info(
+        msg=f'Изменения персонажей уровня {level} получены: '
+            f'изменено {len(rows)}, удалено {len(removed_ids)}',
+    )
+    return generate_response(
+        status_code=200,
+        data=response_data,
+    )
+
+
+def get_leaderboard_by_level(api_key: str, stat: str, params: QueryDict | None = None) -> (int, dict):
+    '''
+    Получение рейтинга персонажей по характеристике
+
+    Args:
+        api_key: API ключ
+        stat: характеристика
+            "attack"
+        params: параметры постраничного вывода и выбора полей
+            {
+                "limit": 100,
+                "cursor": "eyJpZCI6MTB9",
+                "fields": "id,name,attack"
+            }
+
+    Returns:
+        Код статуса и словарь данных
+        200,
+        {
+            "message": "Успех",
+            "data": {
+                "results": [],
+                "next_cursor": "eyJpZCI6MjB9"
+            }
+        }
+    '''
+
+    logger.info(
+        msg=f'Получение рейтинга персонажей по {stat} с параметрами {params}',
+    )
+
+    if stat not in CHARACTER_STATS:
+        logger.error(
+            msg=f'Рейтинг персонажей по {stat} не существует',
+        )
+        return generate_response(
+            status_code=404,
+        )
+
+    serializer = CharacterPageSerializer(
+        data=params or {},
+    )
+    if not serializer.is_valid():
+        logger.error(
+            msg=f'Невалидные параметры для получения рейтинга персонажей {params} '
+                f'Ошибки: {serializer.errors}',
+        )
+        return generate_response(
+            status_code=400,
+        )
+    page = serializer.validated_data
+
+    # курсор совместим с курсором списка персонажей с ordering=-stat
+    ordering = f'-{stat}'
+    if 'cursor' in page and page['cursor'].get('ordering') != ordering:
+        logger.error(
+            msg=f'Курсор не соответствует рейтингу по {stat}',
+        )
+        return generate_response(
+            status_code=400,
+        )
+
+    status_code, fields = get_fields(
+        params=params,
+    )
+    if status_code != 200:
+        return generate_response(
+            status_code=status_code,
+        )
+
+    status_code, level = get_level(
+        api_key=api_key,
+    )
+    if status_code != 200:
+        logger.error(
+            msg=f'Не удалось получить рейтинг персонажей по {stat}',
+        )
+        return generate_response(
+            status_code=status_code,
+        )
+
+    encoder = CharacterRowEncoder(
+        fields=fields,
+    )
+    try:
+        leaderboard = get_leaderboard(
+            level=level,
+            stat=stat,
+        )
+        # лишняя запись показывает, есть ли следующая страница
+        ids, values = get_leaderboard_page(
+            leaderboard=leaderboard,
+            limit=page['limit'] + 1,
+            position=page.get('cursor'),
+        )
+        store = get_store()
+        if store is not None:
+            rows = list(store.iter_rows_by_ids(level, ids[:page['limit']], encoder.columns))
+        else:
+            rows = list(iter_characters_by_ids(
+                characters=get_visible_characters(
+                    level=level,
+                ),
+                ids=ids[:page['limit']],
+                encoder=encoder,
+            ))
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось получить рейтинг персонажей уровня {level} по {stat} '
+                f'Ошибки: {exc}',
+        )
+        return generate_response(
+            status_code=500,
+        )
+
+    next_cursor = None
+    if len(ids) > page['limit']:
+        next_cursor = encode_cursor({
+            'id': ids[page['limit'] - 1],
+            'ordering': ordering,
+            'value': values[page['limit'] - 1],
+        })
+    response_data = {
+        'results': encoder.encode(rows),
+        'next_cursor': next_cursor,
+    }
+    logger.info(
+        msg=f'Рейтинг персонажей уровня {level} по {stat} получен',
+    )
+    return generate_response(
+        status_code=200,
+        data=response_data,
+    )
+
+
+def get_catalog_by_level(api_key: str) -> (int, dict):
+    '''
+    Получение готового ответа со списком персонажей по уровню
+
+    Args:
+        api_key: API ключ
+
+    Returns:
+        Код статуса и словарь данных
+        200,
+        {
+            "level": 1,
+            "disabled_version": 1720000000000000000,
+            "etag": "9f86d08...",
+            "last_modified": 1720000000,
+            "content": b'{"message":"Успешный успех","data":[]}'
+        }
+        или с итератором частей ответа в content, если доступно
+        больше CHARACTERS_STREAMING_THRESHOLD персонажей
+    '''
+
+    logger.info(
+        msg='Получение каталога персонажей по API ключу персонажей',
+    )
+
+    status_code, level = get_level(
+        api_key=api_key,
+    )
+    if status_code != 200:
+        logger.error(
+            msg='Не удалось получить каталог персонажей по API ключу персонажей',
+        )
+        return generate_response(
+            status_code=status_code,
+        )
+
+    try:
+        catalog = get_catalog(
+            level=level,
+            stream_threshold=CHARACTERS_STREAMING_THRESHOLD,
+        )
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось получить каталог персонажей уровня {level} '
+                f'Ошибки: {exc}',
+        )
+        return generate_response(
+            status_code=500,
+        )
+
+    logger.info(
+        msg=f'Каталог персонажей уровня {level} получен',
+    )
+    return 200, catalog
+
+
+def get_stats_by_level(api_key: str) -> (int, dict):
+    '''
+    Получение статистики характеристик персонажей по уровню
+
+    Args:
+        api_key: API ключ
+
+    Returns:
+        Код статуса и словарь данных
+        200,
+        {
+            "message": "Успех",
+            "data": {
+                "level": 1,
+                "etag": "9f86d08...",
+                "count": 3,
+                "stats": {},
+                "correlations": {},
+                "levels": {}
+            }
+        }
+    '''
+
+    logger.info(
+        msg='Получение статистики персонажей по API ключу персонажей',
+    )
+
+    status_code, level = get_level(
+        api_key=api_key,
+    )
+    if status_code != 200:
+        logger.error(
+            msg='Не удалось получить статистику персонажей по API ключу персонажей',
+        )
+        return generate_response(
+            status_code=status_code,
+        )
+
+    try:
+        stats = get_stats(
+            level=level,
+        )
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось получить статистику персонажей уровня {level} '
+                f'Ошибки: {exc}',
+        )
+        return generate_response(
+            status_code=500,
+        )
+
+    logger.info(
+        msg=f'Статистика персонажей уровня {level} с версией {stats["etag"]} получена',
+    )
+    return generate_response(
+        status_code=200,
+        data=stats,
+    )
+
+
+def get_version_by_level(api_key: str, params: QueryDict | None = None) -> (int, dict):
+    '''
+    Получение версии списка персонажей по уровню без сборки списка
+
+    Args:
+        api_key: API ключ
+        params: параметры запроса
+            {
+                "fields": "id,name",
+                "limit": 100
+            }
+
+    Returns:
+        Код статуса и словарь данных
+        200,
+        {
+            "etag": "2c26b46...",
+            "last_modified": 1720000000
+        }
+    '''
+
+    status_code, level = get_level(
+        api_key=api_key,
+    )
+    if status_code != 200:
+        logger.error(
+            msg=f'Не удалось получить версию списка персонажей с параметрами {params}',
+        )
+        return generate_response(
+            status_code=status_code,
+        )
+
+    if isinstance(params, QueryDict):
+        params = dict(params.lists())
+    return 200, get_characters_validators(level, params or {})
+
+
+def get_catalog_version_by_ids(api_key: str, data: QueryDict,
+                               params: QueryDict | None = None) -> (int, dict):
+    '''
+    Получение версии списка персонажей по id без сериализации персонажей
+
+    Args:
+        api_key: API ключ
+        data: данные персонажей
+            {
+                "characters_ids": [1, 2, 3]
+            }
+        params: параметры запроса
+            {
+                "fields": "id,name"
+            }
+
+    Returns:
+        Код статуса и словарь данных
+        200,
+        {
+            "etag": "2c26b46...",
+            "last_modified": 1720000000
+        }
+    '''
+
+    logger.info(
+        msg=f'Получение версии списка персонажей с данными {data}',
+    )
+
+    serializer = CharacterIDSerializer(
+        data=data,
+    )
+    if not serializer.is_valid():
+        logger.error(
+            msg=f'Невалидные данные для получения версии списка персонажей '
+                f'с данными {data} '
+                f'Ошибки: {serializer.errors}',
+        )
+        return generate_response(
+            status_code=400,
+        )
+
+    status_code, level = get_level(
+        api_key=api_key,
+    )
+    if status_code != 200:
+        logger.error(
+            msg=f'Не удалось получить версию списка персонажей с данными {data}',
+        )
+        return generate_response(
+            status_code=status_code,
+        )
+
+    # список по id является подмножеством списка уровня,
+    # поэтому не меняется пока не меняется версия персонажей
+    ids = serializer.validated_data['characters_ids']
+    fields = params.get('fields', '') if params else ''
+    response_data = get_characters_validators(level, ids, fields)
+    logger.info(
+        msg=f'Версия {response_data["etag"]} списка персонажей с данными {data} получена',
+    )
+    return 200, response_data
+
+
+def get_characters_by_ids(api_key: str, data: QueryDict,
+                          params: QueryDict | None = None) -> (int, dict):
     '''
      Получение списка персонажей по id
 
@@ -185,6 +929,10 @@ def get_characters_by_ids(api_key: str, data: QueryDict) -> (int, dict):
             {
                 "characters_ids": [1, 2, "3"]
             }
+         params: параметры запроса
+            {
+                "fields": "id,name"
+            }
 
      Returns:
          Код статуса и словарь данных
@@ -193,6 +941,18 @@ def get_characters_by_ids(api_key: str, data: QueryDict) -> (int, dict):
              "message": "Успех",
              "data": []
          }
+         или если часть персонажей не найдена
+         206,
+         {
+             "message": "Успех наполовину",
+             "data": {
+                 "results": [],
+                 "missing_ids": [3]
+             }
+         }
+         или итератор частей ответа того же вида с тем же кодом, если
+         запрошено больше CHARACTERS_STREAMING_THRESHOLD персонажей
+         200, <generator>
      '''
 
     logger.info(
@@ -212,6 +972,14 @@ def get_characters_by_ids(api_key: str, data: QueryDict) -> (int, dict):
             status_code=400,
         )
 
+    status_code, fields = get_fields(
+        params=params,
+    )
+    if status_code != 200:
+        return generate_response(
+            status_code=status_code,
+        )
+
     status_code, level = get_level(
         api_key=api_key,
     )
@@ -223,20 +991,35 @@ def get_characters_by_ids(api_key: str, data: QueryDict) -> (int, dict):
             status_code=status_code,
         )
 
-    ids = serializer.validated_data['characters_ids']
+    # повторы убираются с сохранением порядка запроса
+    ids = list(dict.fromkeys(serializer.validated_data['characters_ids']))
+    stream = len(ids) > CHARACTERS_STREAMING_THRESHOLD
 
+    encoder = CharacterRowEncoder(
+        fields=fields,
+    )
     try:
-        levels = CharactersAPIKey.objects.filter(
-            activated=False,
-        ).values_list('access_level', flat=True)
-
-        characters = Character.objects.filter(
-            level__lte=level,
-            id__in=ids,
-            is_available=True,
-        ).exclude(
-            level__in=list(levels),
+        store = get_store()
+        characters = get_visible_characters(
+            level=level,
         )
+        if store is not None:
+            rows = list(store.iter_rows_by_ids(level, ids, encoder.columns))
+            existing_ids = {encoder.get_id(row) for row in rows}
+        elif stream:
+            # код статуса отправляется до строк, поэтому найденные id
+            # выбираются заранее легким запросом только по id
+            existing_ids = get_existing_ids(
+                characters=characters,
+                ids=ids,
+            )
+        else:
+            rows = list(iter_characters_by_ids(
+                characters=characters,
+                ids=ids,
+                encoder=encoder,
+            ))
+            existing_ids = {encoder.get_id(row) for row in rows}
     except Exception as exc:
         logger.error(
             msg=f'Не удалось получить список персонажей уровня {level} '
@@ -247,14 +1030,40 @@ def get_characters_by_ids(api_key: str, data: QueryDict) -> (int, dict):
             status_code=500,
         )
 
-    response_data = CharacterSerializer(
-        instance=characters,
-        many=True,
-    ).data
+    missing_ids = [character_id for character_id in ids if character_id not in existing_ids]
+    status_code = 206 if missing_ids else 200
+    if missing_ids:
+        logger.warning(
+            msg=f'Не найдены персонажи {missing_ids} уровня {level}',
+        )
+
+    if stream:
+        logger.info(
+            msg=f'Потоковая отдача списка персонажей уровня {level}',
+        )
+        if store is None:
+            rows = iter_characters_by_ids(
+                characters=characters,
+                ids=ids,
+                encoder=encoder,
+            )
+        return status_code, iter_characters_content(
+            rows=rows,
+            encoder=encoder,
+            status_code=status_code,
+            missing_ids=missing_ids or None,
+        )
+
+    response_data = encoder.encode(rows)
+    if missing_ids:
+        response_data = {
+            'results': response_data,
+            'missing_ids': missing_ids,
+        }
     logger.info(
         msg=f'Список персонажей {response_data} с данными {data} получен',
     )
     return generate_response(
-        status_code=200,
+        status_code=status_code,
         data=response_data,
     )
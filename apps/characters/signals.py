@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from characters.catalog import (
+    invalidate_catalogs,
+    rebuild_disabled_levels,
+)
+from characters.images import submit_variants
+from characters.models import (
+    Character,
+    CharactersAPIKey,
+)
+from characters.services import bump_api_keys_version
+from characters.visibility import sync_visibility
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+@receiver(post_save, sender=CharactersAPIKey)
+@receiver(post_delete, sender=CharactersAPIKey)
+def invalidate_api_key_cache(sender, instance, **kwargs):
+    # ключ мог быть изменен, поэтому старое значение не известно;
+    # смена общей версии сбрасывает кэши ключей всех процессов
+    transaction.on_commit(bump_api_keys_version)
+
+
+@receiver(pre_save, sender=CharactersAPIKey)
+def remember_access_level(sender, instance, raw=False, **kwargs):
+    instance._previous_access_level = None
+    if instance.pk and not raw:
+        instance._previous_access_level = CharactersAPIKey.objects.filter(
+            pk=instance.pk,
+        ).values_list('access_level', flat=True).first()
+
+
+@receiver(post_save, sender=CharactersAPIKey)
+@receiver(post_delete, sender=CharactersAPIKey)
+def update_disabled_levels(sender, instance, **kwargs):
+    # снимок в кэше заменяется только после фиксации измененного ключа,
+    # иначе другой запрос может собрать его по старым данным
+    transaction.on_commit(rebuild_disabled_levels)
+    # активация ключа меняет видимость только персонажей его уровня
+    sync_visibility(
+        characters=Character.objects.filter(
+            level__in=[
+                instance.access_level,
+                getattr(instance, '_previous_access_level', None),
+            ],
+        ),
+    )
+
+
+@receiver(pre_save, sender=Character)
+def remember_character_level(sender, instance, raw=False, **kwargs):
+    instance._previous_level = None
+    instance._previous_image = None
+    if instance.pk and not raw:
+        instance._previous_level, instance._previous_image = Character.objects.filter(
+            pk=instance.pk,
+        ).values_list('level', 'image').first() or (None, None)
+
+
+@receiver(post_save, sender=Character)
+def update_visibility(sender, instance, **kwargs):
+    sync_visibility(
+        characters=Character.objects.filter(
+            pk=instance.pk,
+        ),
+    )
+
+
+@receiver(post_save, sender=Character)
+def make_image_variants(sender, instance, raw=False, **kwargs):
+    name = instance.image.name if instance.image else None
+    previous = getattr(instance, '_previous_image', None) or None
+    if raw or name == previous:
+        return
+
+    # файл оригинала сохранен, варианты создаются в фоне после фиксации
+    # транзакции, варианты прежнего изображения удаляются той же задачей
+    transaction.on_commit(lambda: submit_variants(name, previous=previous))
+
+
+@receiver(post_save, sender=Character)
+@receiver(post_delete, sender=Character)
+def update_catalogs(sender, instance, **kwargs):
+    levels = [instance.level, getattr(instance, '_previous_level', None)]
+    # до фиксации другой запрос собрал бы каталог по старым данным
+    transaction.on_commit(lambda: invalidate_catalogs(levels=levels))
@@ -0,0 +1,243 @@
+import math
+import statistics
+from array import array
+from itertools import combinations
+
+from django.core.cache import cache
+
+from config.settings import (
+    CHARACTERS_STATS_HISTOGRAM_BINS,
+    CHARACTERS_STREAMING_CHUNK_SIZE,
+)
+
+from characters.catalog import (
+    get_characters_validators,
+    get_visible_characters,
+)
+
+from utils.constants import CHARACTER_STATS
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+STATS_CACHE_KEY = 'characters:stats:{level}'
+STATS_PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+
+def load_columns(level: int) -> dict:
+    '''
+    Загрузка числовых колонок доступных на уровне персонажей
+    в непрерывные массивы за один проход
+
+    Args:
+        level: уровень доступа
+
+    Returns:
+        Словарь массивов по колонкам
+        {
+            "level": array('q', [0, 1]),
+            "hp": array('q', [20, 13]),
+            "attack": array('q', [10, 7]),
+            "speed": array('q', [3, 3])
+        }
+    '''
+
+    names = ('level', *CHARACTER_STATS)
+    columns = {name: array('q') for name in names}
+    appends = [columns[name].append for name in names]
+    rows = get_visible_characters(
+        level=level,
+    ).order_by().values_list(*names)
+    for row in rows.iterator(chunk_size=CHARACTERS_STREAMING_CHUNK_SIZE):
+        for append, value in zip(appends, row):
+            append(value)
+    return columns
+
+
+def get_percentile(values: list, percent: float) -> float:
+    '''
+    Перцентиль с линейной интерполяцией между соседними значениями
+
+    Args:
+        values: отсортированные значения
+            [1, 2, 3, 4]
+        percent: перцентиль от 0 до 100
+            50
+
+    Returns:
+        Значение перцентиля
+        2.5
+    '''
+
+    position = (len(values) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def get_histogram(values: list, bins: int) -> dict:
+    '''
+    Гистограмма с интервалами равной ширины,
+    последний интервал включает правую границу
+
+    Args:
+        values: отсортированные значения
+            [1, 2, 2, 4]
+        bins: количество интервалов
+            2
+
+    Returns:
+        Словарь данных
+        {
+            "edges": [1.0, 2.5, 4.0],
+            "counts": [3, 1]
+        }
+    '''
+
+    low, high = values[0], values[-1]
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    width = (high - low) / bins
+    counts = [0] * bins
+    for value in values:
+        counts[min(int((value - low) / width), bins - 1)] += 1
+    return {
+        'edges': [low + width * index for index in range(bins + 1)],
+        'counts': counts,
+    }
+
+
+def get_correlation(x: array, y: array) -> float | None:
+    try:
+        return statistics.correlation(x, y)
+    except statistics.StatisticsError:
+        # меньше двух значений или постоянная колонка
+        return None
+
+
+def describe(columns: dict) -> dict:
+    '''
+    Расчет статистики по колонкам
+
+    Args:
+        columns: словарь массивов по колонкам, см. load_columns
+
+    Returns:
+        Словарь данных
+        {
+            "count": 2,
+            "stats": {
+                "hp": {
+                    "min": 13,
+                    "max": 20,
+                    "mean": 16.5,
+                    "percentiles": {"50": 16.5},
+                    "histogram": {"edges": [13.0, 20.0], "counts": [2]}
+                }
+            },
+            "correlations": {
+                "hp:attack": 1.0
+            }
+        }
+    '''
+
+    count = len(columns['level'])
+    stats = {}
+    for stat in CHARACTER_STATS:
+        if not count:
+            stats[stat] = None
+            continue
+        values = sorted(columns[stat])
+        stats[stat] = {
+            'min': values[0],
+            'max': values[-1],
+            'mean': math.fsum(values) / count,
+            'percentiles': {
+                str(percent): get_percentile(values, percent)
+                for percent in STATS_PERCENTILES
+            },
+            'histogram': get_histogram(values, CHARACTERS_STATS_HISTOGRAM_BINS),
+        }
+
+    return {
+        'count': count,
+        'stats': stats,
+        'correlations': {
+            f'{x}:{y}': get_correlation(columns[x], columns[y])
+            for x, y in combinations(CHARACTER_STATS, 2)
+        },
+    }
+
+
+def build_stats(level: int, etag: str) -> dict:
+    '''
+    Сборка статистики персонажей, доступных на уровне,
+    в целом и в разбивке по уровням персонажей
+
+    Args:
+        level: уровень доступа
+        etag: версия персонажей уровня
+
+    Returns:
+        Словарь данных
+        {
+            "level": 1,
+            "etag": "9f86d08...",
+            "count": 3,
+            "stats": {},
+            "correlations": {},
+            "levels": {
+                "0": {"count": 2, "stats": {}, "correlations": {}}
+            }
+        }
+    '''
+
+    logger.info(
+        msg=f'Сборка статистики персонажей уровня {level}',
+    )
+
+    columns = load_columns(
+        level=level,
+    )
+    groups = {}
+    for index, character_level in enumerate(columns['level']):
+        groups.setdefault(character_level, array('q')).append(index)
+
+    levels = {}
+    for character_level, indexes in sorted(groups.items()):
+        levels[str(character_level)] = describe({
+            name: array('q', [column[index] for index in indexes])
+            for name, column in columns.items()
+        })
+
+    stats = {
+        'level': level,
+        'etag': etag,
+        **describe(columns),
+        'levels': levels,
+    }
+    cache.set(STATS_CACHE_KEY.format(level=level), stats, timeout=None)
+    return stats
+
+
+def get_stats(level: int) -> dict:
+    '''
+    Получение статистики персонажей уровня, статистика пересобирается
+    при смене версии персонажей, сам каталог для этого не собирается
+
+    Args:
+        level: уровень доступа
+
+    Returns:
+        Словарь данных, см. build_stats
+    '''
+
+    etag = get_characters_validators(level, 'stats')['etag']
+    stats = cache.get(STATS_CACHE_KEY.format(level=level))
+    if stats is None or stats['etag'] != etag:
+        stats = build_stats(
+            level=level,
+            etag=etag,
+        )
+    return stats
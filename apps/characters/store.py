@@ -0,0 +1,230 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import cache
+from typing import Iterator
+
+from config.settings import (
+    CHARACTERS_STORE_ENABLED,
+    CHARACTERS_STREAMING_CHUNK_SIZE,
+)
+
+from characters.catalog import get_characters_version
+from characters.models import (
+    Character,
+    CharacterVisibility,
+)
+
+from utils.cache import is_shared_cache
+from utils.constants import ACCESS_LEVELS
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+NO_LEVEL = -1
+NO_STRING = -1
+
+
+class CharacterStore:
+    '''
+    Копия таблицы персонажей в памяти процесса в виде колонок,
+    строки отсортированы по id, строки имен и изображений
+    хранятся в одной таблице строк
+    '''
+
+    __slots__ = (
+        'version',
+        'ids',
+        'hp',
+        'attack',
+        'speed',
+        'levels',
+        'names',
+        'images',
+        'strings',
+        'visible',
+    )
+
+    def __init__(self, version: int):
+        self.version = version
+        self.ids = array('q')
+        self.hp = array('i')
+        self.attack = array('i')
+        self.speed = array('i')
+        self.levels = array('b')
+        self.names = array('i')
+        self.images = array('i')
+        self.strings = []
+        # позиции видимых на уровне персонажей по возрастанию id
+        self.visible = {level: array('i') for level, _ in ACCESS_LEVELS}
+
+    @classmethod
+    def load(cls, version: int) -> 'CharacterStore':
+        '''
+        Загрузка персонажей и таблицы видимости из базы данных
+
+        Args:
+            version: общая версия персонажей на момент загрузки
+
+        Returns:
+            Заполненное хранилище
+        '''
+
+        store = cls(version)
+        string_refs = {}
+
+        def intern(value: str | None) -> int:
+            if not value:
+                return NO_STRING
+            ref = string_refs.get(value)
+            if ref is None:
+                ref = string_refs[value] = len(store.strings)
+                store.strings.append(value)
+            return ref
+
+        rows = Character.objects.order_by('id').values_list(
+            'id', 'name', 'hp', 'attack', 'speed', 'level', 'image',
+        )
+        for character_id, name, hp, attack, speed, level, image in rows.iterator(
+            chunk_size=CHARACTERS_STREAMING_CHUNK_SIZE,
+        ):
+            store.ids.append(character_id)
+            store.names.append(intern(name))
+            store.hp.append(hp)
+            store.attack.append(attack)
+            store.speed.append(speed)
+            store.levels.append(NO_LEVEL if level is None else level)
+            store.images.append(intern(image))
+
+        visibilities = CharacterVisibility.objects.filter(
+            is_visible=True,
+        ).order_by(
+            'access_level', 'character_id',
+        ).values_list('access_level', 'character_id')
+        for access_level, character_id in visibilities.iterator(
+            chunk_size=CHARACTERS_STREAMING_CHUNK_SIZE,
+        ):
+            position = store.find(character_id)
+            if position is not None:
+                store.visible[access_level].append(position)
+
+        return store
+
+    def find(self, character_id: int) -> int | None:
+        position = bisect_left(self.ids, character_id)
+        if position < len(self.ids) and self.ids[position] == character_id:
+            return position
+        return None
+
+    def is_visible(self, level: int, position: int) -> bool:
+        positions = self.visible.get(level, ())
+        index = bisect_left(positions, position)
+        return index < len(positions) and positions[index] == position
+
+    def count(self, level: int) -> int:
+        return len(self.visible.get(level, ()))
+
+    def get_row(self, position: int, columns: list) -> tuple:
+        row = []
+        for column in columns:
+            if column in ('name', 'image'):
+                ref = getattr(self, f'{column}s')[position]
+                row.append(None if ref == NO_STRING else self.strings[ref])
+            elif column == 'level':
+                level = self.levels[position]
+                row.append(None if level == NO_LEVEL else level)
+            elif column == 'id':
+                row.append(self.ids[position])
+            else:
+                row.append(getattr(self, column)[position])
+        return tuple(row)
+
+    def iter_rows(self, level: int, columns: list, after_id: int | None = None) -> Iterator[tuple]:
+        '''
+        Получение строк персонажей, доступных на уровне, в порядке id
+
+        Args:
+            level: уровень доступа
+            columns: колонки строк
+                ["id", "name"]
+            after_id: id, после которого начинается выдача
+
+        Returns:
+            Итератор строк в колонках columns
+            (1, "Dragon"), (2, "Goblin")
+        '''
+
+        positions = self.visible.get(level, ())
+        start = 0
+        if after_id is not None:
+            start = bisect_left(positions, bisect_right(self.ids, after_id))
+        for index in range(start, len(positions)):
+            yield self.get_row(positions[index], columns)
+
+    def iter_rows_by_ids(self, level: int, ids: list, columns: list) -> Iterator[tuple]:
+        '''
+        Получение строк доступных на уровне персонажей по id в порядке запроса
+
+        Args:
+            level: уровень доступа
+            ids: id персонажей без повторов
+                [3, 1, 2]
+            columns: колонки строк
+                ["id", "name"]
+
+        Returns:
+            Итератор строк в колонках columns
+            (3, "Palladin"), (1, "Dragon")
+        '''
+
+        for character_id in ids:
+            position = self.find(character_id)
+            if position is not None and self.is_visible(level, position):
+                yield self.get_row(position, columns)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+@cache
+def warn_local_cache() -> None:
+    logger.warning(
+        msg='Хранилище персонажей отключено: кэш не общий для процессов',
+    )
+
+
+def get_store() -> CharacterStore | None:
+    '''
+    Получение хранилища персонажей актуальной версии,
+    при смене версии хранилище загружается заново и заменяется целиком
+
+    Returns:
+        Хранилище или None, если оно отключено или кэш не общий
+    '''
+
+    global _store
+
+    if not CHARACTERS_STORE_ENABLED:
+        return None
+    # версия в локальном кэше не меняется при изменениях из других
+    # процессов, и хранилище отдавало бы устаревшие данные
+    if not is_shared_cache():
+        warn_local_cache()
+        return None
+
+    version = get_characters_version()
+    store = _store
+    if store is not None and store.version == version:
+        return store
+
+    with _store_lock:
+        if _store is None or _store.version != version:
+            logger.info(
+                msg=f'Загрузка хранилища персонажей версии {version}',
+            )
+            _store = CharacterStore.load(
+                version=version,
+            )
+        return _store
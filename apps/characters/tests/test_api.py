@@ -0,0 +1,94 @@
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from characters.models import Character
+from characters.services import api_key_cache
+
+
+class CharacterListViewTest(TestCase):
+    fixtures = ['characters.json', 'characters_api_key.json']
+
+    def setUp(self):
+        api_key_cache.clear()
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_API_KEY='a22a35a5-bb01-4c47-adb8-3bda0f2c0b24')
+        self.url = '/api/v1/characters/'
+
+    def request(self, method: str, **headers):
+        if method == 'post':
+            return self.client.post(
+                self.url,
+                data={'characters_ids': [1, 2]},
+                format='json',
+                **headers,
+            )
+        return self.client.get(self.url, **headers)
+
+    def test_validators(self):
+        for method in ('get', 'post'):
+            response = self.request(method)
+
+            self.assertEqual(response.status_code, 200, msg=method)
+            self.assertTrue(response['ETag'].startswith('"'), msg=method)
+            self.assertIn('Last-Modified', response, msg=method)
+            self.assertIn('Api-Key', response['Vary'], msg=method)
+
+    def test_not_modified(self):
+        for method in ('get', 'post'):
+            response = self.request(method)
+            conditions = (
+                {'HTTP_IF_NONE_MATCH': response['ETag']},
+                {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+            )
+
+            for headers in conditions:
+                not_modified = self.request(method, **headers)
+                self.assertEqual(not_modified.status_code, 304, msg=(method, headers))
+                self.assertEqual(not_modified['ETag'], response['ETag'], msg=(method, headers))
+                self.assertEqual(not_modified.content, b'', msg=(method, headers))
+
+    def test_modified_after_change(self):
+        for method in ('get', 'post'):
+            response = self.request(method)
+
+            character = Character.objects.get(pk=1)
+            character.hp += 1
+            with self.captureOnCommitCallbacks(execute=True):
+                character.save()
+
+            modified = self.request(method, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(modified.status_code, 200, msg=method)
+            self.assertNotEqual(modified['ETag'], response['ETag'], msg=method)
+
+    def test_streaming(self):
+        with patch('characters.services.CHARACTERS_STREAMING_THRESHOLD', 1):
+            response = self.request('get')
+            self.assertIsInstance(response, StreamingHttpResponse)
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        cache.clear()
+        self.assertEqual(json.loads(content), self.request('get').json())
+
+    def test_by_ids_status(self):
+        data = {'characters_ids': [1, 100]}
+        response = self.client.post(self.url, data=data, format='json')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.json()['data']['missing_ids'], [100])
+
+        with patch('characters.services.CHARACTERS_STREAMING_THRESHOLD', 1):
+            streamed = self.client.post(self.url, data=data, format='json')
+        self.assertIsInstance(streamed, StreamingHttpResponse)
+        self.assertEqual(streamed.status_code, 206)
+        self.assertEqual(json.loads(b''.join(streamed.streaming_content)), response.json())
+
+        response = self.client.post(self.url, data={'characters_ids': [1, 2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([character['id'] for character in response.json()['data']], [1, 2])
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from characters.catalog import (
+    get_catalog,
+    get_visible_characters,
+)
+from characters.models import Character
+
+
+class TransferCharactersTest(TestCase):
+    fixtures = ['characters.json']
+
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def call(self, *args) -> str:
+        stdout = StringIO()
+        call_command('transfer_characters', *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def test_export_import(self):
+        Character.objects.filter(pk=1).update(level=None)
+        for file_format in ('csv', 'jsonl'):
+            path = os.path.join(self.dir.name, f'characters.{file_format}')
+            expected = list(Character.objects.order_by('id').values_list(
+                'name', 'hp', 'attack', 'speed', 'level', 'is_available',
+            ))
+
+            output = self.call('export', path)
+            self.assertIn('строк/с', output, msg=file_format)
+
+            Character.objects.update(hp=1)
+            stderr = StringIO()
+            call_command('transfer_characters', 'import', path, '--batch-size', '2',
+                         stdout=StringIO(), stderr=stderr)
+            self.assertEqual(stderr.getvalue(), '', msg=file_format)
+            self.assertEqual(
+                list(Character.objects.order_by('id').values_list(
+                    'name', 'hp', 'attack', 'speed', 'level', 'is_available',
+                )),
+                expected,
+                msg=file_format,
+            )
+
+    def test_import_upsert(self):
+        catalog = get_catalog(level=0)
+        path = os.path.join(self.dir.name, 'characters.jsonl')
+        rows = [
+            {'name': 'Dragon', 'hp': 100, 'attack': 10, 'speed': 3, 'level': 0},
+            {'name': 'Phoenix', 'hp': 30, 'attack': 9, 'speed': 8, 'level': 0},
+            {'name': 'Phoenix', 'hp': 40, 'attack': 9, 'speed': 8, 'level': 0},
+            {'name': 'Broken', 'hp': -1, 'attack': 1, 'speed': 1},
+        ]
+        with open(path, 'w') as file:
+            for row in rows:
+                file.write(json.dumps(row) + '\n')
+
+        count = Character.objects.count()
+        self.call('import', path, '--batch-size', '3')
+
+        self.assertEqual(Character.objects.count(), count + 1)
+        self.assertEqual(Character.objects.get(name='Dragon').hp, 100)
+        self.assertEqual(Character.objects.get(name='Phoenix').hp, 40)
+        self.assertFalse(Character.objects.filter(name='Broken').exists())
+        self.assertTrue(get_visible_characters(level=0).filter(name='Phoenix').exists())
+        self.assertNotEqual(get_catalog(level=0)['etag'], catalog['etag'])
+
+    def test_import_deleted(self):
+        dragon = Character.objects.get(name='Dragon')
+        dragon.delete()
+        path = os.path.join(self.dir.name, 'characters.jsonl')
+        with open(path, 'w') as file:
+            file.write(json.dumps({'name': 'Dragon', 'hp': 100, 'attack': 10, 'speed': 3}) + '\n')
+
+        self.call('import', path)
+
+        # последний удаленный персонаж с тем же именем восстанавливается
+        dragon.refresh_from_db()
+        self.assertIsNone(dragon.deleted_at)
+        self.assertEqual(dragon.hp, 100)
+        self.assertEqual(Character.objects.filter(name='Dragon').count(), 1)
@@ -0,0 +1,108 @@
+import io
+import tempfile
+from io import StringIO
+
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from characters.images import (
+    VARIANT_SIZES,
+    get_storage,
+    get_variant_name,
+    get_variant_names,
+    make_variants,
+    variants_executor,
+)
+from characters.models import Character
+
+
+class ImageVariantsTest(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        content = io.BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(content, format='JPEG')
+        self.name = get_storage().save('characters/dragon.jpg', ContentFile(content.getvalue()))
+
+    def test_make_variants_on_save(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Character.objects.create(
+                name='Dragon',
+                hp=20,
+                attack=10,
+                speed=3,
+                image=self.name,
+            )
+        # очередь из одного потока, пустая задача выполнится после вариантов
+        variants_executor.submit(lambda: None).result()
+
+        storage = get_storage()
+        for size, width in VARIANT_SIZES.items():
+            for image_format in ('jpeg', 'webp'):
+                with storage.open(get_variant_name(self.name, size, image_format)) as file:
+                    with Image.open(file) as image:
+                        self.assertEqual(image.format, image_format.upper())
+                        self.assertEqual(image.size, (width, round(width * 2 / 3)))
+
+        self.assertEqual(make_variants(self.name), 0)
+        self.assertEqual(make_variants(self.name, force=True), len(VARIANT_SIZES) * 2)
+
+    def test_delete_previous_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            character = Character.objects.create(
+                name='Dragon',
+                hp=20,
+                attack=10,
+                speed=3,
+                image=self.name,
+            )
+        content = io.BytesIO()
+        Image.new('RGB', (600, 400), 'blue').save(content, format='PNG')
+        name = get_storage().save('characters/dog.png', ContentFile(content.getvalue()))
+
+        character.image = name
+        with self.captureOnCommitCallbacks(execute=True):
+            character.save()
+        variants_executor.submit(lambda: None).result()
+
+        storage = get_storage()
+        for size, formats in get_variant_names(self.name).items():
+            for image_format, variant_name in formats.items():
+                self.assertFalse(storage.exists(variant_name))
+                self.assertTrue(storage.exists(get_variant_name(name, size, image_format)))
+
+    def test_make_character_variants(self):
+        for name in ('Dragon', 'Red dragon'):
+            Character.objects.create(
+                name=name,
+                hp=20,
+                attack=10,
+                speed=3,
+                image=self.name,
+            )
+        stdout = StringIO()
+        call_command('make_character_variants', '--processes', '1', stdout=stdout)
+        # общее изображение обрабатывается один раз
+        self.assertIn('Обработано 1 изображений', stdout.getvalue())
+        self.assertIn(f'создано вариантов: {len(VARIANT_SIZES) * 2}', stdout.getvalue())
+        self.assertTrue(get_storage().exists(get_variant_name(self.name, 'small', 'webp')))
+
+    def test_variant_name(self):
+        self.assertEqual(
+            get_variant_name('characters/dragon.png', 'small', 'webp'),
+            'characters/variants/small/dragon.png.webp',
+        )
+        self.assertNotEqual(
+            get_variant_name('characters/a.b.png', 'small', 'webp'),
+            get_variant_name('characters/a_b.png', 'small', 'webp'),
+        )
@@ -0,0 +1,56 @@
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from characters.models import Character
+from characters.serializers import (
+    CharacterRowEncoder,
+    CharacterSerializer,
+)
+
+
+class CharacterRowEncoderTest(TestCase):
+    fixtures = ['characters.json']
+
+    @classmethod
+    def setUpTestData(cls):
+        Character.objects.create(
+            name='Wizard',
+            hp=10,
+            attack=12,
+            speed=5,
+            image='characters/old wizard (1).png',
+            level=2,
+        )
+        Character.objects.create(
+            name='Ghost',
+            hp=1,
+            attack=1,
+            speed=9,
+            image=None,
+            level=None,
+        )
+
+    def test_encode(self):
+        characters = Character.objects.order_by('id')
+        fields_list = (
+            None,
+            ['id', 'name', 'level'],
+            ['name', 'image'],
+            ['id', 'image_variants', 'level'],
+        )
+
+        for fields in fields_list:
+            encoder = CharacterRowEncoder(
+                fields=fields,
+            )
+            data = encoder.encode(characters.values_list(*encoder.columns))
+            expected = CharacterSerializer(
+                instance=characters,
+                many=True,
+                fields=fields,
+            ).data
+            self.assertEqual(
+                JSONRenderer().render(data),
+                JSONRenderer().render(expected),
+                msg=fields,
+            )
@@ -1,14 +1,44 @@
 import json
 import os
+import statistics
+from unittest.mock import patch
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.db import (
+    IntegrityError,
+    transaction,
+)
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
 
 
+from characters.admin import CharacterAdmin
+from characters.catalog import (
+    CATALOG_CACHE_KEY,
+    get_disabled_levels_snapshot,
+    get_visible_characters,
+)
+from characters.models import (
+    Character,
+    CharactersAPIKey,
+)
 from characters.services import (
+    API_KEYS_VERSION_CACHE_KEY,
+    api_key_cache,
+    get_api_keys_version,
     get_key,
     get_level,
     get_characters_by_level,
     get_characters_by_ids,
+    get_catalog_by_level,
+    get_catalog_version_by_ids,
+    get_changes_by_level,
+    get_leaderboard_by_level,
+    get_stats_by_level,
+    get_version_by_level,
 )
+from characters.store import get_store
 from users.models import CustomUser
 
 
@@ -28,12 +58,31 @@ class ServicesTest(TestCase):
             url_hash='fc0ecf9c-4c37-4bb2-8c22-938a1dc65da4',
         )
 
+    def setUp(self):
+        api_key_cache.clear()
+        cache.clear()
+        # кэш ключей работает только с общим кэшем, как в рабочем окружении
+        shared_cache = patch('characters.services.is_shared_cache', return_value=True)
+        shared_cache.start()
+        self.addCleanup(shared_cache.stop)
+
     def test_get_key(self):
         status_code, response_data = get_key(
             user=self.user,
         )
         self.assertEqual(status_code, 200)
 
+        CharactersAPIKey.objects.filter(access_level=self.user.level).delete()
+        status_code, response_data = get_key(
+            user=self.user,
+        )
+        self.assertEqual(status_code, 200)
+        self.assertEqual(get_key(user=self.user), (status_code, response_data))
+        self.assertEqual(
+            CharactersAPIKey.objects.get(access_level=self.user.level).key,
+            response_data['data']['api_key'],
+        )
+
     def test_get_level(self):
         path = f'{self.path}/get_level'
         fixtures = (
@@ -53,11 +102,82 @@ class ServicesTest(TestCase):
             )
             self.assertEqual(status_code, code, msg=fixture)
 
+    def test_get_level_cache(self):
+        api_key = 'ec78dd68-795f-4ca7-a7a5-e60516e85f07'
+        # уровень ключа уникален, освобождаем уровни для переноса ключа
+        CharactersAPIKey.objects.filter(access_level__in=[2, 3]).delete()
+        initial_stats = api_key_cache.stats()
+
+        get_level(api_key=api_key)
+        with self.assertNumQueries(0):
+            status_code, level = get_level(api_key=api_key)
+        self.assertEqual((status_code, level), (200, 1))
+
+        get_level(api_key='not-found')
+        with self.assertNumQueries(0):
+            status_code, level = get_level(api_key='not-found')
+        self.assertEqual(status_code, 404)
+
+        key = CharactersAPIKey.objects.get(key=api_key)
+        key.access_level = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            key.save()
+        status_code, level = get_level(api_key=api_key)
+        self.assertEqual((status_code, level), (200, 2))
+
+        stats = api_key_cache.stats()
+        self.assertEqual(stats['hits'] - initial_stats['hits'], 2)
+        self.assertEqual(stats['misses'] - initial_stats['misses'], 3)
+
+        # изменение ключа в другом процессе меняет только общую версию
+        CharactersAPIKey.objects.filter(key=api_key).update(access_level=3)
+        cache.set(API_KEYS_VERSION_CACHE_KEY, get_api_keys_version() + 1)
+        self.assertEqual(get_level(api_key=api_key), (200, 3))
+
+    @patch('characters.services.is_shared_cache', return_value=False)
+    def test_get_level_local_cache(self, _):
+        api_key = 'ec78dd68-795f-4ca7-a7a5-e60516e85f07'
+        get_level(api_key=api_key)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_level(api_key=api_key), (200, 1))
+
+    def test_disabled_levels_snapshot(self):
+        snapshot = get_disabled_levels_snapshot()
+        self.assertEqual(snapshot['levels'], [])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_disabled_levels_snapshot(), snapshot)
+
+        key = CharactersAPIKey.objects.get(access_level=1)
+        key.activated = False
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            key.save()
+        # до фиксации снимок не меняется
+        self.assertEqual(get_disabled_levels_snapshot(), snapshot)
+
+        for callback in callbacks:
+            callback()
+        new_snapshot = get_disabled_levels_snapshot()
+        self.assertEqual(new_snapshot['levels'], [1])
+        self.assertNotEqual(new_snapshot['version'], snapshot['version'])
+
+        # снимок перечитывается из базы данных после истечения срока
+        cache.delete('characters:disabled_levels')
+        self.assertEqual(get_disabled_levels_snapshot(), new_snapshot)
+
     def test_get_characters_by_level(self):
         path = f'{self.path}/get_characters_by_level'
         fixtures = (
             (200, 'valid'),
             (200, 'valid_without_api_key'),
+            (200, 'valid_page'),
+            (200, 'valid_fields'),
+            (200, 'valid_filters'),
+            (400, 'invalid_cursor'),
+            (400, 'invalid_limit'),
+            (400, 'invalid_fields'),
+            (400, 'invalid_range'),
+            (400, 'invalid_ordering'),
             (404, 'not_found'),
         )
 
@@ -69,16 +189,299 @@ class ServicesTest(TestCase):
 
             status_code, level = get_characters_by_level(
                 api_key=data['api_key'],
+                params=data.get('params'),
+            )
+            self.assertEqual(status_code, code, msg=fixture)
+
+    def test_get_characters_by_level_pages(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+        _, response_data = get_characters_by_level(
+            api_key=api_key,
+        )
+        expected_ids = sorted(character['id'] for character in response_data['data'])
+
+        ids = []
+        params = {'limit': 2}
+        while True:
+            status_code, response_data = get_characters_by_level(
+                api_key=api_key,
+                params=params,
+            )
+            self.assertEqual(status_code, 200)
+            page = response_data['data']
+            self.assertLessEqual(len(page['results']), 2)
+            ids += [character['id'] for character in page['results']]
+            if page['next_cursor'] is None:
+                break
+            params = {'limit': 2, 'cursor': page['next_cursor']}
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_get_characters_by_level_filters(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+        filters = {'hp_min': 10, 'attack_max': 10, 'ordering': '-speed'}
+        expected_ids = [
+            character.id
+            for character in Character.objects.filter(
+                hp__gte=10,
+                attack__lte=10,
+            ).order_by('-speed', '-id')
+        ]
+
+        status_code, response_data = get_characters_by_level(
+            api_key=api_key,
+            params=filters,
+        )
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            [character['id'] for character in response_data['data']],
+            expected_ids,
+        )
+
+        ids = []
+        params = {'limit': 1, 'fields': 'name', **filters}
+        while True:
+            status_code, response_data = get_characters_by_level(
+                api_key=api_key,
+                params=params,
+            )
+            self.assertEqual(status_code, 200)
+            page = response_data['data']
+            self.assertNotIn('speed', page['results'][0])
+            ids += [
+                Character.objects.get(name=character['name']).id
+                for character in page['results']
+            ]
+            if page['next_cursor'] is None:
+                break
+            params['cursor'] = page['next_cursor']
+
+        self.assertEqual(ids, expected_ids)
+
+        params['ordering'] = 'hp'
+        status_code, _ = get_characters_by_level(
+            api_key=api_key,
+            params=params,
+        )
+        self.assertEqual(status_code, 400)
+
+    def test_get_changes_by_level(self):
+        path = f'{self.path}/get_changes_by_level'
+        fixtures = (
+            (200, 'valid'),
+            (200, 'valid_without_api_key'),
+            (400, 'invalid_since'),
+            (404, 'not_found'),
+        )
+
+        for code, name in fixtures:
+            fixture = f'{code}_{name}'
+
+            with open(f'{path}/{fixture}_request.json') as file:
+                data = json.load(file)
+
+            status_code, response_data = get_changes_by_level(
+                api_key=data['api_key'],
+                params=data.get('params'),
+            )
+            self.assertEqual(status_code, code, msg=fixture)
+
+    @patch('characters.services.CHARACTERS_CHANGES_OVERLAP', 0)
+    def test_get_changes_by_level_sync(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+        _, response_data = get_changes_by_level(api_key=api_key)
+        changes = response_data['data']
+        self.assertTrue(changes['full'])
+        self.assertEqual([character['id'] for character in changes['updated']], [1, 2, 3, 4, 5])
+
+        _, response_data = get_changes_by_level(api_key=api_key, params={'since': changes['version']})
+        changes = response_data['data']
+        self.assertFalse(changes['full'])
+        self.assertEqual(changes['updated'], [])
+        self.assertEqual(changes['removed'], [])
+
+        character = Character.objects.get(pk=2)
+        character.hp = 50
+        character.save()
+        character = Character.objects.get(pk=3)
+        character.is_available = False
+        character.save()
+        Character.objects.get(pk=1).delete()
+
+        _, response_data = get_changes_by_level(api_key=api_key, params={'since': changes['version']})
+        changes = response_data['data']
+        self.assertEqual([character['id'] for character in changes['updated']], [2])
+        self.assertEqual(changes['updated'][0]['hp'], 50)
+        self.assertEqual(changes['removed'], [1, 3])
+
+        character.is_available = True
+        character.save()
+        key = CharactersAPIKey.objects.get(access_level=2)
+        key.activated = False
+        key.save()
+        _, response_data = get_changes_by_level(api_key=api_key, params={'since': changes['version']})
+        self.assertEqual([character['id'] for character in response_data['data']['updated']], [3])
+        self.assertEqual(response_data['data']['removed'], [4])
+
+        # полное удаление оставляет скрытую строку видимости
+        version = response_data['data']['version']
+        Character.objects.get(pk=5).hard_delete()
+        _, response_data = get_changes_by_level(api_key=api_key, params={'since': version})
+        self.assertEqual(response_data['data']['updated'], [])
+        self.assertEqual(response_data['data']['removed'], [5])
+
+        _, response_data = get_changes_by_level(
+            api_key='ec78dd68-795f-4ca7-a7a5-e60516e85f07',
+            params={'since': changes['version']},
+        )
+        self.assertTrue(response_data['data']['full'])
+
+    def test_get_leaderboard_by_level(self):
+        path = f'{self.path}/get_leaderboard_by_level'
+        fixtures = (
+            (200, 'valid'),
+            (200, 'valid_without_api_key'),
+            (400, 'invalid_limit'),
+            (404, 'not_found'),
+            (404, 'invalid_stat'),
+        )
+
+        for code, name in fixtures:
+            fixture = f'{code}_{name}'
+
+            with open(f'{path}/{fixture}_request.json') as file:
+                data = json.load(file)
+
+            status_code, response_data = get_leaderboard_by_level(
+                api_key=data['api_key'],
+                stat=data['stat'],
+                params=data.get('params'),
+            )
+            self.assertEqual(status_code, code, msg=fixture)
+
+    def test_get_leaderboard_by_level_pages(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+
+        def get_ids():
+            ids = []
+            params = {'limit': 2}
+            while True:
+                status_code, response_data = get_leaderboard_by_level(
+                    api_key=api_key,
+                    stat='speed',
+                    params=params,
+                )
+                self.assertEqual(status_code, 200)
+                page = response_data['data']
+                ids += [character['id'] for character in page['results']]
+                if page['next_cursor'] is None:
+                    return ids
+                params['cursor'] = page['next_cursor']
+
+        def get_expected_ids():
+            _, response_data = get_characters_by_level(
+                api_key=api_key,
+                params={'ordering': '-speed'},
+            )
+            return [character['id'] for character in response_data['data']]
+
+        self.assertEqual(get_ids(), get_expected_ids())
+
+        # рейтинг собран, запрос только за строками страницы
+        with self.assertNumQueries(1):
+            get_leaderboard_by_level(api_key=api_key, stat='speed', params={'limit': 1})
+
+        character = Character.objects.get(pk=2)
+        character.speed = 100
+        with self.captureOnCommitCallbacks() as callbacks:
+            character.save()
+            # до фиксации рейтинг не пересобирается по незафиксированным данным
+            self.assertNotEqual(get_ids()[0], 2)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_ids(), get_expected_ids())
+        self.assertEqual(get_ids()[0], 2)
+
+        character.is_available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            character.save()
+        self.assertNotIn(2, get_ids())
+
+        key = CharactersAPIKey.objects.get(access_level=3)
+        key.activated = False
+        with self.captureOnCommitCallbacks(execute=True):
+            key.save()
+        self.assertEqual(get_ids(), get_expected_ids())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Character.objects.get(pk=1).delete()
+        self.assertEqual(get_ids(), get_expected_ids())
+
+    def test_get_catalog_by_level(self):
+        path = f'{self.path}/get_catalog_by_level'
+        fixtures = (
+            (200, 'valid'),
+            (200, 'valid_without_api_key'),
+            (404, 'not_found'),
+        )
+
+        for code, name in fixtures:
+            fixture = f'{code}_{name}'
+
+            with open(f'{path}/{fixture}_request.json') as file:
+                data = json.load(file)
+
+            status_code, response_data = get_catalog_by_level(
+                api_key=data['api_key'],
             )
             self.assertEqual(status_code, code, msg=fixture)
 
+            if status_code == 200:
+                _, expected = get_characters_by_level(
+                    api_key=data['api_key'],
+                )
+                self.assertEqual(
+                    response_data['content'],
+                    JSONRenderer().render(expected),
+                    msg=fixture,
+                )
+
+    def test_get_catalog_by_level_invalidation(self):
+        api_key = 'ec78dd68-795f-4ca7-a7a5-e60516e85f07'
+        _, catalog = get_catalog_by_level(api_key=api_key)
+        with self.assertNumQueries(0):
+            _, cached_catalog = get_catalog_by_level(api_key=api_key)
+        self.assertEqual(cached_catalog['etag'], catalog['etag'])
+
+        character = Character.objects.filter(level=1).first()
+        character.hp += 1
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            character.save()
+        _, uncommitted_catalog = get_catalog_by_level(api_key=api_key)
+        self.assertEqual(uncommitted_catalog['etag'], catalog['etag'])
+
+        for callback in callbacks:
+            callback()
+        _, new_catalog = get_catalog_by_level(api_key=api_key)
+        self.assertNotEqual(new_catalog['etag'], catalog['etag'])
+
+        key = CharactersAPIKey.objects.get(access_level=1)
+        key.activated = False
+        with self.captureOnCommitCallbacks(execute=True):
+            key.save()
+        _, disabled_catalog = get_catalog_by_level(api_key=api_key)
+        self.assertNotIn(b'"level":"1"', disabled_catalog['content'])
+
     def test_get_characters_by_ids(self):
         path = f'{self.path}/get_characters_by_ids'
         fixtures = (
             (200, 'valid'),
             (200, 'valid_without_api_key'),
+            (200, 'valid_fields'),
+            (206, 'partial'),
             (400, 'invalid'),
             (400, 'invalid_structure'),
+            (400, 'invalid_fields'),
             (404, 'not_found'),
         )
 
@@ -88,8 +491,262 @@ class ServicesTest(TestCase):
             with open(f'{path}/{fixture}_request.json') as file:
                 data = json.load(file)
 
-            status_code, level = get_characters_by_ids(
+            status_code, response_data = get_characters_by_ids(
                 api_key=data['api_key'],
                 data=data['data'],
+                params=data.get('params'),
+            )
+            self.assertEqual(status_code, code, msg=fixture)
+
+            if name == 'valid_fields':
+                for character in response_data['data']:
+                    self.assertEqual(list(character), ['id', 'name', 'level'])
+
+            if name == 'partial':
+                data = response_data['data']
+                self.assertEqual([character['id'] for character in data['results']], [1, 2])
+                self.assertEqual(data['missing_ids'], [3, 100])
+
+    @patch('characters.catalog.CHARACTERS_IDS_CHUNK_SIZE', 2)
+    def test_get_characters_by_ids_order(self):
+        status_code, response_data = get_characters_by_ids(
+            api_key='a22a35a5-bb01-4c47-adb8-3bda0f2c0b24',
+            data={'characters_ids': [5, 3, 5, 1, 4, 2]},
+        )
+        self.assertEqual(status_code, 200)
+        self.assertEqual(
+            [character['id'] for character in response_data['data']],
+            [5, 3, 1, 4, 2],
+        )
+
+    def test_get_stats_by_level(self):
+        path = f'{self.path}/get_stats_by_level'
+        fixtures = (
+            (200, 'valid'),
+            (200, 'valid_without_api_key'),
+            (404, 'not_found'),
+        )
+
+        for code, name in fixtures:
+            fixture = f'{code}_{name}'
+
+            with open(f'{path}/{fixture}_request.json') as file:
+                data = json.load(file)
+
+            status_code, response_data = get_stats_by_level(
+                api_key=data['api_key'],
             )
-            self.assertEqual(status_code, code, msg=fixture)
\ No newline at end of file
+            self.assertEqual(status_code, code, msg=fixture)
+
+            if status_code == 200:
+                _, characters = get_characters_by_level(
+                    api_key=data['api_key'],
+                )
+                stats = response_data['data']
+                self.assertEqual(stats['count'], len(characters['data']), msg=fixture)
+                self.assertEqual(
+                    sum(level['count'] for level in stats['levels'].values()),
+                    stats['count'],
+                    msg=fixture,
+                )
+
+    def test_get_stats_by_level_values(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+        _, response_data = get_stats_by_level(api_key=api_key)
+        stats = response_data['data']
+        hp = [character.hp for character in get_visible_characters(level=3)]
+
+        self.assertEqual(stats['stats']['hp']['min'], min(hp))
+        self.assertEqual(stats['stats']['hp']['max'], max(hp))
+        self.assertAlmostEqual(stats['stats']['hp']['mean'], statistics.mean(hp))
+        self.assertAlmostEqual(stats['stats']['hp']['percentiles']['50'], statistics.median(hp))
+        self.assertEqual(sum(stats['stats']['hp']['histogram']['counts']), len(hp))
+
+        with self.assertNumQueries(0):
+            _, cached = get_stats_by_level(api_key=api_key)
+        self.assertEqual(cached['data']['etag'], stats['etag'])
+        # версия статистики не требует сборки каталога уровня
+        self.assertIsNone(cache.get(CATALOG_CACHE_KEY.format(level=3)))
+
+        character = Character.objects.order_by('id').first()
+        character.hp = 1000
+        with self.captureOnCommitCallbacks(execute=True):
+            character.save()
+        _, response_data = get_stats_by_level(api_key=api_key)
+        self.assertNotEqual(response_data['data']['etag'], stats['etag'])
+        self.assertEqual(response_data['data']['stats']['hp']['max'], 1000)
+
+    def test_get_version_by_level(self):
+        api_key = 'ec78dd68-795f-4ca7-a7a5-e60516e85f07'
+        params = {'fields': 'id,name'}
+        _, version = get_version_by_level(api_key=api_key, params=params)
+        with self.assertNumQueries(0):
+            _, same_version = get_version_by_level(api_key=api_key, params=params)
+        self.assertEqual(version, same_version)
+
+        _, other_version = get_version_by_level(api_key=api_key)
+        self.assertNotEqual(version['etag'], other_version['etag'])
+
+        character = Character.objects.get(pk=1)
+        character.attack += 1
+        with self.captureOnCommitCallbacks(execute=True):
+            character.save()
+        _, new_version = get_version_by_level(api_key=api_key, params=params)
+        self.assertNotEqual(version['etag'], new_version['etag'])
+
+        status_code, _ = get_version_by_level(api_key='not-found')
+        self.assertEqual(status_code, 404)
+
+    def test_get_catalog_version_by_ids(self):
+        path = f'{self.path}/get_catalog_version_by_ids'
+        fixtures = (
+            (200, 'valid'),
+            (200, 'valid_without_api_key'),
+            (400, 'invalid'),
+            (400, 'invalid_structure'),
+            (404, 'not_found'),
+        )
+
+        for code, name in fixtures:
+            fixture = f'{code}_{name}'
+
+            with open(f'{path}/{fixture}_request.json') as file:
+                data = json.load(file)
+
+            status_code, version = get_catalog_version_by_ids(
+                api_key=data['api_key'],
+                data=data['data'],
+            )
+            self.assertEqual(status_code, code, msg=fixture)
+
+    def test_get_catalog_version_by_ids_changes(self):
+        api_key = 'ec78dd68-795f-4ca7-a7a5-e60516e85f07'
+        data = {'characters_ids': [1, 2, 3]}
+        _, version = get_catalog_version_by_ids(api_key=api_key, data=data)
+        _, same_version = get_catalog_version_by_ids(api_key=api_key, data=data)
+        self.assertEqual(version, same_version)
+
+        _, other_version = get_catalog_version_by_ids(
+            api_key=api_key,
+            data={'characters_ids': [1, 2]},
+        )
+        self.assertNotEqual(version['etag'], other_version['etag'])
+
+        character = Character.objects.get(pk=1)
+        character.attack += 1
+        with self.captureOnCommitCallbacks(execute=True):
+            character.save()
+        _, new_version = get_catalog_version_by_ids(api_key=api_key, data=data)
+        self.assertNotEqual(version['etag'], new_version['etag'])
+
+    @patch('characters.catalog.CHARACTERS_STREAMING_CHUNK_SIZE', 2)
+    @patch('characters.services.CHARACTERS_STREAMING_THRESHOLD', 1)
+    def test_get_characters_streaming(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+        requests = (
+            (200, get_characters_by_level, {'params': {'fields': 'id,name'}}),
+            (200, get_characters_by_ids, {'data': {'characters_ids': [5, 1, 2, 3, 4]}}),
+            (206, get_characters_by_ids, {'data': {'characters_ids': [5, 100, 1, 2, 3]}}),
+        )
+
+        for code, service, kwargs in requests:
+            status_code, content = service(api_key=api_key, **kwargs)
+            self.assertEqual(status_code, code)
+            content = b''.join(content)
+
+            with patch('characters.services.CHARACTERS_STREAMING_THRESHOLD', 10000):
+                _, expected = service(api_key=api_key, **kwargs)
+            self.assertEqual(content, JSONRenderer().render(expected))
+
+    def test_characters_store(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+        requests = (
+            (get_characters_by_level, {}),
+            (get_characters_by_level, {'params': {'fields': 'name,level'}}),
+            (get_characters_by_level, {'params': {'limit': 2}}),
+            (get_characters_by_ids, {'data': {'characters_ids': [5, 1, 2]}}),
+            (get_characters_by_ids, {'data': {'characters_ids': [5, 100, 1]}}),
+        )
+        expected = [service(api_key=api_key, **kwargs) for service, kwargs in requests]
+
+        with patch('characters.store.CHARACTERS_STORE_ENABLED', True), \
+                patch('characters.store.is_shared_cache', return_value=True):
+            for (service, kwargs), response in zip(requests, expected):
+                self.assertEqual(service(api_key=api_key, **kwargs), response)
+
+            with self.assertNumQueries(0):
+                get_characters_by_level(api_key=api_key)
+                get_characters_by_ids(api_key=api_key, data={'characters_ids': [3]})
+
+            character = Character.objects.get(pk=1)
+            character.level = 3
+            with self.captureOnCommitCallbacks(execute=True):
+                character.save()
+            _, response_data = get_characters_by_level(
+                api_key='ec78dd68-795f-4ca7-a7a5-e60516e85f07',
+            )
+            self.assertNotIn(1, [character['id'] for character in response_data['data']])
+
+    def test_characters_store_local_cache(self):
+        with patch('characters.store.CHARACTERS_STORE_ENABLED', True):
+            self.assertIsNone(get_store())
+
+    def test_visibility(self):
+        def visible_ids(level):
+            return list(get_visible_characters(level=level).values_list('id', flat=True))
+
+        self.assertEqual(visible_ids(0), [1, 2])
+        self.assertEqual(visible_ids(3), [1, 2, 3, 4, 5])
+
+        character = Character.objects.get(pk=4)
+        character.level = 1
+        character.save()
+        self.assertEqual(visible_ids(1), [1, 2, 3, 4])
+
+        CharacterAdmin(Character, admin.site).make_unavailable(
+            request=None,
+            queryset=Character.objects.filter(pk__in=[1, 3]),
+        )
+        self.assertEqual(visible_ids(3), [2, 4, 5])
+
+        key = CharactersAPIKey.objects.get(access_level=3)
+        key.activated = False
+        key.save()
+        self.assertEqual(visible_ids(3), [2, 4])
+
+        Character.objects.get(pk=2).delete()
+        self.assertEqual(visible_ids(3), [4])
+
+    def test_queryset_soft_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            count, _ = Character.objects.filter(pk__in=[1, 2]).delete()
+
+        self.assertEqual(count, 2)
+        self.assertEqual(Character.objects.filter(deleted_at__isnull=False).count(), 2)
+        self.assertNotIn(1, get_visible_characters(level=3).values_list('id', flat=True))
+
+        # имя удаленного персонажа можно занять заново
+        character = Character.objects.get(pk=1)
+        Character.objects.create(name=character.name, hp=1, attack=1, speed=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Character.objects.create(name=character.name, hp=1, attack=1, speed=1)
+
+        Character.objects.filter(pk=2).hard_delete()
+        self.assertFalse(Character.objects.filter(pk=2).exists())
+
+    def test_admin_update_invalidates_on_commit(self):
+        api_key = 'a22a35a5-bb01-4c47-adb8-3bda0f2c0b24'
+        get_catalog_by_level(api_key=api_key)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            CharacterAdmin(Character, admin.site).make_unavailable(
+                request=None,
+                queryset=Character.objects.filter(pk=1),
+            )
+            _, catalog = get_catalog_by_level(api_key=api_key)
+            self.assertIn(b'{"id":1,', catalog['content'])
+
+        for callback in callbacks:
+            callback()
+        _, catalog = get_catalog_by_level(api_key=api_key)
+        self.assertNotIn(b'{"id":1,', catalog['content'])
@@ -2,7 +2,10 @@ from django.urls import path
 
 from characters.api import (
     APIKeyView,
+    CharacterChangesView,
+    CharacterLeaderboardView,
     CharacterListView,
+    CharacterStatsView,
 )
 
 
@@ -11,6 +14,18 @@ urlpatterns = [
         'get_key/',
         APIKeyView.as_view(),
     ),
+    path(
+        'changes/',
+        CharacterChangesView.as_view(),
+    ),
+    path(
+        'leaderboards/<str:stat>/',
+        CharacterLeaderboardView.as_view(),
+    ),
+    path(
+        'stats/',
+        CharacterStatsView.as_view(),
+    ),
     path(
         '',
         CharacterListView.as_view(),
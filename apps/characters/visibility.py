@@ -0,0 +1,140 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from config.settings import CHARACTERS_IDS_CHUNK_SIZE
+
+from characters.catalog import (
+    invalidate_catalogs,
+    load_disabled_levels,
+)
+from characters.models import (
+    Character,
+    CharacterVisibility,
+)
+
+from utils.constants import ACCESS_LEVELS
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def get_access_levels(level: int | None, is_available: bool, disabled_levels: list) -> list:
+    '''
+    Получение уровней доступа, на которых виден персонаж
+
+    Args:
+        level: уровень персонажа
+        is_available: доступность персонажа
+        disabled_levels: отключенные уровни
+            [1]
+
+    Returns:
+        Список уровней
+        [2, 3]
+    '''
+
+    if not is_available or level is None or level in disabled_levels:
+        return []
+    return [access_level for access_level, _ in ACCESS_LEVELS if access_level >= level]
+
+
+def sync_visibility(characters: QuerySet) -> None:
+    '''
+    Пересчет таблицы видимости для персонажей частями
+
+    Args:
+        characters: queryset измененных персонажей
+    '''
+
+    # уровни читаются из базы данных в той же транзакции,
+    # снимок в кэше может отставать от только что измененных ключей
+    disabled_levels = load_disabled_levels()
+    rows = characters.values_list('id', 'level', 'is_available', 'deleted_at').order_by()
+
+    with transaction.atomic():
+        chunk = []
+        for row in rows.iterator(chunk_size=CHARACTERS_IDS_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == CHARACTERS_IDS_CHUNK_SIZE:
+                _sync_chunk(chunk, disabled_levels)
+                chunk = []
+        if chunk:
+            _sync_chunk(chunk, disabled_levels)
+
+
+def update_characters(characters: QuerySet, **fields) -> int:
+    '''
+    Массовое изменение персонажей, update не отправляет сигналы, поэтому
+    видимость пересчитывается здесь, а каталоги сбрасываются после фиксации
+
+    Args:
+        characters: queryset изменяемых персонажей
+        fields: новые значения полей
+            {"is_available": false}
+
+    Returns:
+        Количество измененных персонажей
+        2
+    '''
+
+    with transaction.atomic():
+        # id выбираются до изменения, фильтр queryset может
+        # перестать совпадать с измененными персонажами
+        ids = list(characters.values_list('id', flat=True))
+        characters = Character.objects.filter(id__in=ids)
+        levels = list(characters.values_list('level', flat=True).distinct())
+        count = characters.update(updated_at=timezone.now(), **fields)
+        sync_visibility(
+            characters=characters,
+        )
+        # до фиксации другой запрос собрал бы каталог по старым данным
+        transaction.on_commit(lambda: invalidate_catalogs(levels=levels))
+    return count
+
+
+def _sync_chunk(rows: list, disabled_levels: list) -> None:
+    # строки меняются только при смене видимости, чтобы updated_at
+    # показывал момент появления или скрытия персонажа на уровне
+    visibilities = CharacterVisibility.objects.filter(
+        character_id__in=[row[0] for row in rows],
+    )
+    existing = {
+        (access_level, character_id): is_visible
+        for access_level, character_id, is_visible in visibilities.values_list(
+            'access_level', 'character_id', 'is_visible',
+        )
+    }
+
+    shown = []
+    hidden = []
+    created = []
+    for character_id, level, is_available, deleted_at in rows:
+        access_levels = get_access_levels(
+            level=level,
+            is_available=is_available and deleted_at is None,
+            disabled_levels=disabled_levels,
+        )
+        for access_level, _ in ACCESS_LEVELS:
+            key = (access_level, character_id)
+            is_visible = access_level in access_levels
+            if key not in existing:
+                if is_visible:
+                    created.append(CharacterVisibility(
+                        access_level=access_level,
+                        character_id=character_id,
+                    ))
+            elif existing[key] != is_visible:
+                (shown if is_visible else hidden).append(key)
+
+    now = timezone.now()
+    for keys, is_visible in ((shown, True), (hidden, False)):
+        for access_level, _ in ACCESS_LEVELS:
+            ids = [character_id for key_level, character_id in keys if key_level == access_level]
+            if ids:
+                visibilities.filter(
+                    access_level=access_level,
+                    character_id__in=ids,
+                ).update(is_visible=is_visible, updated_at=now)
+    CharacterVisibility.objects.bulk_create(created)
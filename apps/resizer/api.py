@@ -0,0 +1,47 @@
+from django.http import (
+    FileResponse,
+    HttpResponse,
+)
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from config.settings import MEDIA_RESIZE_MAX_AGE
+
+from resizer.services import resize_media
+
+from utils.conditional_requests import is_not_modified
+
+
+class ResizeView(APIView):
+    authentication_classes = []
+
+    def get(self, request, name):
+        data = {
+            'name': name,
+            **request.query_params.dict(),
+        }
+        status_code, response_data = resize_media(
+            data=data,
+        )
+        if status_code != 200:
+            return Response(
+                status=status_code,
+                data=response_data
+            )
+
+        if is_not_modified(request, etag=response_data['etag'], last_modified=None):
+            response_data['file'].close()
+            response = HttpResponse(
+                status=304,
+            )
+        else:
+            response = FileResponse(
+                response_data['file'],
+                content_type=response_data['content_type'],
+            )
+        # содержимое по ключу не меняется, поэтому кэшируется надолго
+        response['ETag'] = quote_etag(response_data['etag'])
+        patch_cache_control(response, public=True, max_age=MEDIA_RESIZE_MAX_AGE, immutable=True)
+        return response
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class ResizerConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'resizer'
+    verbose_name = 'Изменение размера изображений'
@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from config.settings import (
+    MEDIA_RESIZE_PREFIXES,
+    MEDIA_RESIZE_WIDTHS,
+)
+
+from utils.images import IMAGE_FORMATS
+
+
+class ResizeSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    width = serializers.ChoiceField(
+        choices=MEDIA_RESIZE_WIDTHS,
+    )
+    # не format, этот параметр DRF использует для выбора рендерера
+    type = serializers.ChoiceField(
+        choices=list(IMAGE_FORMATS),
+        default='webp',
+    )
+
+    def validate_name(self, value):
+        parts = value.split('/')
+        if '..' in parts or '' in parts or not value.startswith(tuple(MEDIA_RESIZE_PREFIXES)):
+            raise serializers.ValidationError(
+                "Недопустимый путь"
+            )
+        return value
@@ -0,0 +1,153 @@
+import hashlib
+
+from PIL import (
+    Image,
+    UnidentifiedImageError,
+)
+from django.core.files.storage import default_storage
+
+from config.settings import (
+    MEDIA_RESIZE_CACHE_DIR,
+    MEDIA_RESIZE_CACHE_SIZE,
+)
+
+from resizer.serializers import ResizeSerializer
+
+from utils.disk_cache import DiskLRUCache
+from utils.images import (
+    IMAGE_FORMATS,
+    encode,
+    open_for_width,
+    resize,
+)
+from utils.logger import get_logger
+from utils.response_patterns import generate_response
+
+
+logger = get_logger(__name__)
+
+resize_cache = DiskLRUCache(
+    directory=MEDIA_RESIZE_CACHE_DIR,
+    max_size=MEDIA_RESIZE_CACHE_SIZE,
+)
+
+
+def make_resized(name: str, width: int, image_format: str) -> bytes:
+    '''
+    Уменьшение изображения из хранилища
+
+    Args:
+        name: путь изображения в хранилище
+            "avatars/default.jpeg"
+        width: ширина в пикселях
+            256
+        image_format: формат
+            "webp"
+
+    Returns:
+        Содержимое файла
+    '''
+
+    logger.info(
+        msg=f'Уменьшение изображения {name} до ширины {width} в формате {image_format}',
+    )
+    with default_storage.open(name) as file, Image.open(file) as image:
+        image = open_for_width(image, width)
+        return encode(resize(image, width), image_format)
+
+
+def resize_media(data: dict) -> (int, dict):
+    '''
+    Получение уменьшенного изображения из дискового кэша,
+    при промахе изображение уменьшается один раз
+
+    Args:
+        data: параметры изображения
+            {
+                "name": "avatars/default.jpeg",
+                "width": 256,
+                "type": "webp"
+            }
+
+    Returns:
+        Код статуса и словарь данных
+        200,
+        {
+            "file": <file>,
+            "etag": "2c26b46...",
+            "content_type": "image/webp"
+        }
+    '''
+
+    logger.info(
+        msg=f'Получение уменьшенного изображения с данными {data}',
+    )
+
+    serializer = ResizeSerializer(
+        data=data,
+    )
+    if not serializer.is_valid():
+        logger.error(
+            msg=f'Невалидные данные для уменьшения изображения {data} '
+                f'Ошибки: {serializer.errors}',
+        )
+        return generate_response(
+            status_code=400,
+        )
+
+    name = serializer.validated_data['name']
+    width = serializer.validated_data['width']
+    image_format = serializer.validated_data['type']
+
+    try:
+        if not default_storage.exists(name):
+            logger.error(
+                msg=f'Изображение {name} не найдено',
+            )
+            return generate_response(
+                status_code=404,
+            )
+
+        # время изменения в ключе, чтобы замена файла давала новую версию
+        modified = default_storage.get_modified_time(name).timestamp()
+        etag = hashlib.sha256(f'{name}:{modified}:{width}:{image_format}'.encode()).hexdigest()
+        key = f'{etag}.{IMAGE_FORMATS[image_format][0]}'
+
+        # файл может быть вытеснен между получением пути и открытием
+        for _ in range(2):
+            path = resize_cache.get_or_create(
+                key=key,
+                create=lambda: make_resized(name, width, image_format),
+            )
+            try:
+                file = open(path, 'rb')
+                break
+            except FileNotFoundError:
+                continue
+        else:
+            raise FileNotFoundError(path)
+    except UnidentifiedImageError as exc:
+        logger.error(
+            msg=f'Файл {name} не является изображением '
+                f'Ошибки: {exc}',
+        )
+        return generate_response(
+            status_code=400,
+        )
+    except Exception as exc:
+        logger.error(
+            msg=f'Не удалось уменьшить изображение {name} '
+                f'Ошибки: {exc}',
+        )
+        return generate_response(
+            status_code=500,
+        )
+
+    logger.info(
+        msg=f'Уменьшенное изображение {name} получено',
+    )
+    return 200, {
+        'file': file,
+        'etag': etag,
+        'content_type': f'image/{image_format}',
+    }
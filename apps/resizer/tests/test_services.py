@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase
+
+from resizer.services import resize_media
+
+from utils.disk_cache import DiskLRUCache
+
+
+CUR_DIR = os.path.dirname(__file__)
+
+
+class ServicesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.path = f'{CUR_DIR}/fixtures/services'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        cache_patch = patch(
+            'resizer.services.resize_cache',
+            DiskLRUCache(directory=self.directory, max_size=10 * 1024 * 1024),
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    def test_resize_media(self):
+        path = f'{self.path}/resize_media'
+        fixtures = (
+            (200, 'valid'),
+            (200, 'valid_jpeg'),
+            (400, 'invalid_width'),
+            (400, 'invalid_name'),
+            (404, 'not_found'),
+        )
+
+        for code, name in fixtures:
+            fixture = f'{code}_{name}'
+
+            with open(f'{path}/{fixture}_request.json') as file:
+                data = json.load(file)
+
+            status_code, response_data = resize_media(
+                data=data,
+            )
+            self.assertEqual(status_code, code, msg=fixture)
+
+            if status_code == 200:
+                with response_data['file'] as file, Image.open(file) as image:
+                    self.assertEqual(image.format, data['type'].upper(), msg=fixture)
+                    self.assertLessEqual(image.width, int(data['width']), msg=fixture)
+
+    def test_resize_media_not_image(self):
+        name = default_storage.save('avatars/not_image.jpeg', ContentFile(b'not an image'))
+        self.addCleanup(default_storage.delete, name)
+
+        status_code, _ = resize_media(data={'name': name, 'width': 64})
+        self.assertEqual(status_code, 400)
+
+    def test_resize_media_cache(self):
+        data = {'name': 'avatars/default.jpeg', 'width': 64}
+        _, response_data = resize_media(data=data)
+        response_data['file'].close()
+
+        with patch('resizer.services.make_resized') as mock_make_resized:
+            _, cached = resize_media(data=data)
+            cached['file'].close()
+        mock_make_resized.assert_not_called()
+        self.assertEqual(cached['etag'], response_data['etag'])
+
+
+class DiskLRUCacheTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_eviction(self):
+        cache = DiskLRUCache(directory=self.directory, max_size=25)
+        cache.set('a', b'a' * 10)
+        cache.set('b', b'b' * 10)
+        cache.get('a')
+        cache.set('c', b'c' * 10)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.size, 20)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['a', 'c'])
+
+        reloaded = DiskLRUCache(directory=self.directory, max_size=25)
+        self.assertEqual(reloaded.get('c').read_bytes(), b'c' * 10)
+
+    def test_shared_directory(self):
+        # кэши разных процессов с одним каталогом учитывают файлы друг друга
+        first = DiskLRUCache(directory=self.directory, max_size=25)
+        second = DiskLRUCache(directory=self.directory, max_size=25)
+        first.set('a', b'a' * 10)
+        second.set('b', b'b' * 10)
+        first.set('c', b'c' * 10)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ['b', 'c'])
+        self.assertIsNone(second.get('a'))
+        self.assertEqual(first.size, 20)
+
+    def test_coalescing(self):
+        cache = DiskLRUCache(directory=self.directory, max_size=1024)
+        calls = []
+
+        def create():
+            calls.append(1)
+            time.sleep(0.05)
+            return b'content'
+
+        threads = [
+            threading.Thread(target=cache.get_or_create, args=('key', create))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get('key').read_bytes(), b'content')
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from resizer.api import ResizeView
+
+
+urlpatterns = [
+    path(
+        'resize/<path:name>',
+        ResizeView.as_view(),
+    ),
+]
@@ -2,6 +2,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from users.authentication import (
+    revoke_access_token,
+    load_user,
+)
 from users.services import (
     register,
     auth,
@@ -62,7 +66,10 @@ class LogoutView(APIView):
         data = request.data
         status_code, response_data = logout(
             data=data,
+            user=request.user,
         )
+        if status_code == 200 and request.auth is not None:
+            revoke_access_token(request.auth)
         return Response(
             status=status_code,
             data=response_data
@@ -73,7 +80,7 @@ class CustomUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
+        user = load_user(request.user)
         status_code, response_data = detail(
             user=user,
         )
@@ -83,7 +90,7 @@ class CustomUserView(APIView):
         )
 
     def post(self, request):
-        user = request.user
+        user = load_user(request.user)
         data = request.data
         status_code, response_data = change_password(
             user=user,
@@ -95,7 +102,7 @@ class CustomUserView(APIView):
         )
 
     def patch(self, request):
-        user = request.user
+        user = load_user(request.user)
         data = request.data
         status_code, response_data = update(
             user=user,
@@ -107,7 +114,7 @@ class CustomUserView(APIView):
         )
 
     def delete(self, request):
-        user = request.user
+        user = load_user(request.user)
         status_code, response_data = remove(
             user=user,
         )
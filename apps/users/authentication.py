@@ -1,13 +1,285 @@
+import hashlib
+import time
+from functools import cache
+
+from django.shortcuts import get_object_or_404
+from django.urls import (
+    URLResolver,
+    get_resolver,
+)
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import AllowAny
 from rest_framework.request import Request
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from config.settings import (
+    SIMPLE_JWT,
+    USERS_CLAIMS_AUTH_ENABLED,
+    USERS_TOKEN_CACHE_SIZE,
+)
+
+from users.claims import (
+    USER_CLAIMS,
+    get_token_state,
+    is_token_revoked,
+    revoke_token,
+)
+from users.models import CustomUser
+
+from utils.cache import (
+    TTLCache,
+    is_shared_cache,
+)
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# проверенные access токены по хэшу, запись живет до истечения токена
+access_token_cache = TTLCache(
+    max_size=USERS_TOKEN_CACHE_SIZE,
+    ttl=SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds(),
+)
+
+
+def get_token_digest(raw_token: bytes | str) -> str:
+    if isinstance(raw_token, str):
+        raw_token = raw_token.encode()
+    return hashlib.sha256(raw_token).hexdigest()
+
+
+def evict_access_token(raw_token: bytes | str) -> None:
+    '''
+    Удаление access токена из кэша проверенных токенов
+
+    Args:
+        raw_token: закодированный токен
+    '''
+
+    access_token_cache.delete(get_token_digest(raw_token))
+
+
+def revoke_access_token(validated_token) -> None:
+    '''
+    Отзыв access токена при выходе: подпись токена остается
+    действительной до истечения, поэтому jti запоминается в кэше
+
+    Args:
+        validated_token: проверенный access токен запроса
+    '''
+
+    evict_access_token(validated_token.token)
+    revoke_token(
+        jti=validated_token[api_settings.JTI_CLAIM],
+        ttl=validated_token['exp'] - time.time(),
+    )
+
+
+def is_claims_auth_enabled() -> bool:
+    '''
+    Проверка режима пользователя из данных токена: режим требует
+    общего кэша, через который доходят изменения пользователя
+
+    Returns:
+        Признак режима
+    '''
+
+    if not USERS_CLAIMS_AUTH_ENABLED:
+        return False
+    if not is_shared_cache():
+        warn_local_cache()
+        return False
+    return True
+
+
+@cache
+def warn_local_cache() -> None:
+    logger.warning(
+        msg='Пользователь из данных токена отключен: кэш не общий для процессов',
+    )
+
+
+class ClaimsUser(TokenUser):
+    '''
+    Пользователь без обращения к базе данных, собранный из данных access токена,
+    данные, измененные после выдачи токена, берутся из кэша
+    '''
+
+    def __str__(self) -> str:
+        return self.email
+
+    @cached_property
+    def _token_state(self) -> (dict | None, bool):
+        return get_token_state(self.id, self.token[api_settings.JTI_CLAIM])
+
+    @property
+    def state(self) -> dict:
+        state, _ = self._token_state
+        if state is None:
+            return {claim: self.token[claim] for claim in USER_CLAIMS}
+        return state
+
+    @property
+    def is_token_revoked(self) -> bool:
+        _, revoked = self._token_state
+        return revoked
+
+    @property
+    def email(self) -> str:
+        return self.state['email']
+
+    @property
+    def level(self) -> int | None:
+        return self.state['level']
+
+    @property
+    def is_active(self) -> bool:
+        return self.state['is_active']
+
+
+def load_user(user) -> CustomUser:
+    '''
+    Получение модели пользователя для изменяющих его операций
+
+    Args:
+        user: пользователь запроса, модель или ClaimsUser
+
+    Returns:
+        Модель пользователя
+    '''
+
+    if isinstance(user, CustomUser):
+        return user
+    return get_object_or_404(CustomUser, pk=user.pk)
+
+
+def is_anonymous_view(view) -> bool:
+    '''
+    Проверка, что представление доступно без аутентификации:
+    все его разрешения - AllowAny или его наследники
+
+    Args:
+        view: класс представления DRF
+
+    Returns:
+        Признак анонимного доступа
+    '''
+
+    permission_classes = getattr(view, 'permission_classes', ())
+    # составные разрешения (IsAuthenticated | AllowAny) не являются классами
+    return bool(permission_classes) and all(
+        isinstance(permission, type) and issubclass(permission, AllowAny)
+        for permission in permission_classes
+    )
+
+
+def get_view_access(view) -> dict:
+    return {
+        'view': f'{view.__module__}.{view.__qualname__}',
+        'anonymous': is_anonymous_view(view),
+    }
+
+
+@cache
+def build_view_registry(resolver: URLResolver) -> dict:
+    '''
+    Сборка таблицы представлений DRF из URLconf с признаком анонимного доступа,
+    таблица собирается один раз на каждый загруженный URLconf
+
+    Args:
+        resolver: корневой URLResolver
+
+    Returns:
+        Словарь данных по функциям представлений
+        {
+            <function CustomUserView>: {
+                "route": "api/v1/users/",
+                "view": "users.api.CustomUserView",
+                "anonymous": false
+            }
+        }
+    '''
+
+    registry = {}
+    patterns = [('', pattern) for pattern in resolver.url_patterns]
+    while patterns:
+        prefix, pattern = patterns.pop()
+        route = f'{prefix}{pattern.pattern}'
+        if isinstance(pattern, URLResolver):
+            patterns.extend((route, child) for child in pattern.url_patterns)
+            continue
+        view = getattr(pattern.callback, 'cls', None)
+        if view is not None:
+            registry[pattern.callback] = {
+                'route': route,
+                **get_view_access(view),
+            }
+    return registry
+
+
+def get_view_registry(urlconf: str | None = None) -> dict:
+    '''
+    Получение таблицы представлений URLconf, см. build_view_registry
+
+    Args:
+        urlconf: модуль URLconf, по умолчанию ROOT_URLCONF
+
+    Returns:
+        Словарь данных по функциям представлений
+    '''
+
+    # get_resolver кэширует URLResolver, после clear_url_caches таблица собирается заново
+    return build_view_registry(get_resolver(urlconf))
 
 
 class CustomJWTAuthentication(JWTAuthentication):
 
     def authenticate(self, request: Request):
-        view = request.resolver_match.func.cls
-        permission_classes = getattr(view, 'permission_classes', [])
-        if 'AllowAny' in str(permission_classes):
+        func = request.resolver_match.func
+        access = get_view_registry(getattr(request, 'urlconf', None)).get(func)
+        if access is None:
+            access = get_view_access(func.cls)
+        if access['anonymous']:
             return None
 
         return super().authenticate(request)
+
+    def get_validated_token(self, raw_token: bytes):
+        if not USERS_TOKEN_CACHE_SIZE:
+            return super().get_validated_token(raw_token)
+
+        # подпись и данные токена не меняются, поэтому результат проверки
+        # действителен до истечения токена
+        key = get_token_digest(raw_token)
+        found, validated_token = access_token_cache.get(key)
+        if found:
+            return validated_token
+
+        validated_token = super().get_validated_token(raw_token)
+        ttl = validated_token['exp'] - time.time()
+        if ttl > 0:
+            access_token_cache.set(key, validated_token, ttl=ttl)
+        return validated_token
+
+    def get_user(self, validated_token):
+        # токены, выданные до включения режима, не содержат данных пользователя;
+        # без общего кэша изменения пользователя из других процессов
+        # не видны, и пользователь загружается из базы данных
+        if not is_claims_auth_enabled() or any(
+            claim not in validated_token for claim in (api_settings.USER_ID_CLAIM, *USER_CLAIMS)
+        ):
+            if is_token_revoked(validated_token[api_settings.JTI_CLAIM]):
+                raise AuthenticationFailed(_('Token is revoked'), code='token_revoked')
+            return super().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+        # данные пользователя и отзыв токена читаются из кэша одним запросом
+        if user.is_token_revoked:
+            raise AuthenticationFailed(_('Token is revoked'), code='token_revoked')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
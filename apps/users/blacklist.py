@@ -0,0 +1,256 @@
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from config.settings import (
+    USERS_BLACKLIST_FILTER_ENABLED,
+    USERS_BLACKLIST_FILTER_ERROR_RATE,
+    USERS_BLACKLIST_FILTER_MIN_CAPACITY,
+    USERS_BLACKLIST_FILTER_TTL,
+)
+
+from utils.bloom import BloomFilter
+from utils.cache import is_shared_cache
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+BLACKLIST_VERSION_CACHE_KEY = 'users:blacklist:version'
+# записи, добавленные незадолго до синхронизации, могут быть еще не закоммичены
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def estimate_blacklist_size() -> int:
+    '''
+    Оценка количества записей черного списка по статистике таблицы,
+    без статистики выполняется подсчет
+
+    Returns:
+        Количество записей
+        120000
+    '''
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [BlacklistedToken._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1, если таблица еще не анализировалась
+        if row is not None and row[0] >= 0:
+            return row[0]
+    return BlacklistedToken.objects.count()
+
+
+def init_blacklist_version() -> None:
+    # после потери ключа версия начинается с нового значения,
+    # которое не совпадет с версией фильтров процессов
+    cache.add(BLACKLIST_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+
+
+def get_blacklist_version() -> int:
+    init_blacklist_version()
+    return cache.get(BLACKLIST_VERSION_CACHE_KEY, 0)
+
+
+def bump_blacklist_version() -> int:
+    init_blacklist_version()
+    return cache.incr(BLACKLIST_VERSION_CACHE_KEY)
+
+
+def is_blacklist_filter_enabled() -> bool:
+    '''
+    Проверка, что проверки черного списка идут через фильтр: отрицательный
+    ответ фильтра пропускает запрос к базе данных, поэтому версия черного
+    списка должна доходить до всех процессов через общий кэш
+
+    Returns:
+        Признак включенного фильтра
+    '''
+
+    if not USERS_BLACKLIST_FILTER_ENABLED:
+        return False
+    if not is_shared_cache():
+        warn_local_cache()
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def warn_local_cache() -> None:
+    logger.warning(
+        msg='Фильтр черного списка токенов отключен: кэш не общий для процессов',
+    )
+
+
+class BlacklistFilter:
+    '''
+    Фильтр Блума по jti refresh токенов из черного списка в памяти процесса,
+    токены из других процессов догружаются по общей версии черного списка,
+    записи, добавленные без смены версии, попадают в фильтр при пересборке
+    раз в USERS_BLACKLIST_FILTER_TTL секунд
+    '''
+
+    def __init__(self):
+        self.bloom = None
+        self.version = None
+        self.synced_at = None
+        self.built_at = None
+        self.checks = 0
+        self.negatives = 0
+        self.false_positives = 0
+        # jti, добавленные во время сборки, переносятся в новый фильтр
+        self._pending = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def _build(self, version) -> None:
+        # фильтр собирается без блокировки, проверки идут по прежнему
+        # фильтру, под блокировкой выполняется только замена ссылки
+        with self._lock:
+            self._pending = []
+        try:
+            synced_at = timezone.now()
+            size = estimate_blacklist_size()
+            logger.info(
+                msg=f'Сборка фильтра черного списка токенов, записей: {size}',
+            )
+            # запас под токены, которые будут добавлены до следующей сборки
+            bloom = BloomFilter(
+                capacity=max(size * 2, USERS_BLACKLIST_FILTER_MIN_CAPACITY),
+                error_rate=USERS_BLACKLIST_FILTER_ERROR_RATE,
+            )
+            # истекшие токены не проходят проверку и без черного списка
+            rows = BlacklistedToken.objects.filter(
+                token__expires_at__gt=synced_at,
+            ).values_list('token__jti', flat=True)
+            for jti in rows.iterator():
+                bloom.add(jti)
+            with self._lock:
+                for jti in self._pending:
+                    bloom.add(jti)
+                self.bloom = bloom
+                self.version = version
+                self.synced_at = synced_at
+                self.built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def _update(self, version, since) -> None:
+        synced_at = timezone.now()
+        jtis = list(BlacklistedToken.objects.filter(
+            blacklisted_at__gte=since - SYNC_OVERLAP,
+        ).values_list('token__jti', flat=True))
+        with self._lock:
+            for jti in jtis:
+                self.bloom.add(jti)
+            if self.synced_at == since:
+                self.version = version
+                self.synced_at = synced_at
+
+    def _sync(self) -> None:
+        # версия читается до запроса: токены, добавленные после чтения,
+        # изменят версию и будут догружены при следующей проверке
+        version = get_blacklist_version()
+        with self._lock:
+            bloom = self.bloom
+            current = self.version
+            synced_at = self.synced_at
+            built_at = self.built_at
+        rebuild = (
+            bloom is None
+            or bloom.count > bloom.capacity
+            or time.monotonic() - built_at > USERS_BLACKLIST_FILTER_TTL
+        )
+        # собирает один поток, остальные ждут только первую сборку
+        if rebuild and self._build_lock.acquire(blocking=bloom is None):
+            try:
+                # пока поток ждал, фильтр мог собрать другой поток
+                if self.bloom is bloom:
+                    self._build(version)
+            finally:
+                self._build_lock.release()
+        elif version != current:
+            self._update(version, synced_at)
+
+    def might_contain(self, jti: str) -> bool:
+        '''
+        Проверка jti по фильтру
+
+        Args:
+            jti: идентификатор токена
+
+        Returns:
+            False, если токена точно нет в черном списке,
+            True, если он может там быть
+        '''
+
+        self._sync()
+        with self._lock:
+            self.checks += 1
+            found = jti in self.bloom
+            if not found:
+                self.negatives += 1
+            return found
+
+    def add(self, jti: str) -> None:
+        '''
+        Добавление jti после занесения токена в черный список, версию
+        меняет сигнал сохранения записи черного списка
+
+        Args:
+            jti: идентификатор токена
+        '''
+
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+            if self._pending is not None:
+                self._pending.append(jti)
+
+    def add_false_positive(self) -> None:
+        with self._lock:
+            self.false_positives += 1
+
+    def stats(self) -> dict:
+        '''
+        Статистика фильтра
+
+        Returns:
+            Словарь данных
+            {
+                "size": 1200,
+                "capacity": 2000,
+                "checks": 100,
+                "negatives": 95,
+                "false_positives": 1,
+                "false_positive_rate": 0.0098,
+                "observed_false_positive_rate": 0.0104
+            }
+        '''
+
+        with self._lock:
+            return {
+                'size': self.bloom.count if self.bloom is not None else 0,
+                'capacity': self.bloom.capacity if self.bloom is not None else 0,
+                'checks': self.checks,
+                'negatives': self.negatives,
+                'false_positives': self.false_positives,
+                'false_positive_rate': self.bloom.false_positive_rate() if self.bloom is not None else 0.0,
+                'observed_false_positive_rate': (
+                    self.false_positives / (self.false_positives + self.negatives)
+                    if self.false_positives + self.negatives else 0.0
+                ),
+            }
+
+
+blacklist_filter = BlacklistFilter()
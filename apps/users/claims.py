@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.settings import SIMPLE_JWT
+
+from users.blacklist import (
+    blacklist_filter,
+    is_blacklist_filter_enabled,
+)
+
+
+USER_CLAIMS = ('email', 'level', 'is_active')
+USER_STATE_CACHE_KEY = 'users:state:{user_id}'
+REVOKED_TOKEN_CACHE_KEY = 'users:revoked:{jti}'
+
+
+def get_user_claims(user) -> dict:
+    '''
+    Получение данных пользователя, которые хранятся в токене
+
+    Args:
+        user: пользователь
+
+    Returns:
+        Словарь данных
+        {
+            "email": "test@cc.com",
+            "level": 0,
+            "is_active": true
+        }
+    '''
+
+    return {claim: getattr(user, claim) for claim in USER_CLAIMS}
+
+
+class ClaimsRefreshToken(RefreshToken):
+    '''
+    Refresh токен с данными пользователя, данные копируются в access токен
+    '''
+
+    @classmethod
+    def for_user(cls, user) -> 'ClaimsRefreshToken':
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+
+    def set_user_claims(self, user) -> None:
+        for claim, value in get_user_claims(user).items():
+            self[claim] = value
+
+    def check_blacklist(self) -> None:
+        # запрос к черному списку только при возможном совпадении в фильтре
+        enabled = is_blacklist_filter_enabled()
+        if enabled and not blacklist_filter.might_contain(
+            self.payload[api_settings.JTI_CLAIM],
+        ):
+            return
+        super().check_blacklist()
+        if enabled:
+            blacklist_filter.add_false_positive()
+
+    def blacklist(self):
+        result = super().blacklist()
+        if is_blacklist_filter_enabled():
+            blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+def get_user_state(user_id: int) -> dict | None:
+    '''
+    Получение актуальных данных пользователя, измененных после выдачи токенов
+
+    Args:
+        user_id: id пользователя
+
+    Returns:
+        Словарь данных, см. get_user_claims, или None,
+        если данные не менялись за время жизни access токена
+    '''
+
+    return cache.get(USER_STATE_CACHE_KEY.format(user_id=user_id))
+
+
+def set_user_state(user_id: int, state: dict) -> None:
+    '''
+    Сохранение измененных данных пользователя, запись живет не дольше
+    access токена: токены, выданные до изменения, к этому времени истекут;
+    сигналы отправляет только save, поэтому после массовых изменений
+    (QuerySet.update, bulk_update) функция вызывается для каждого
+    измененного пользователя явно
+
+    Args:
+        user_id: id пользователя
+        state: данные пользователя, см. get_user_claims
+    '''
+
+    cache.set(
+        USER_STATE_CACHE_KEY.format(user_id=user_id),
+        state,
+        timeout=SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds(),
+    )
+
+
+def get_token_state(user_id: int, jti: str) -> (dict | None, bool):
+    '''
+    Получение актуальных данных пользователя и признака отзыва
+    access токена одним запросом к кэшу
+
+    Args:
+        user_id: id пользователя
+        jti: идентификатор access токена
+
+    Returns:
+        Данные пользователя, см. get_user_state, и признак отзыва
+        None, False
+    '''
+
+    state_key = USER_STATE_CACHE_KEY.format(user_id=user_id)
+    revoked_key = REVOKED_TOKEN_CACHE_KEY.format(jti=jti)
+    values = cache.get_many([state_key, revoked_key])
+    return values.get(state_key), revoked_key in values
+
+
+def is_token_revoked(jti: str) -> bool:
+    return cache.get(REVOKED_TOKEN_CACHE_KEY.format(jti=jti)) is not None
+
+
+def revoke_token(jti: str, ttl: float) -> None:
+    '''
+    Отзыв access токена, запись живет до истечения токена
+
+    Args:
+        jti: идентификатор access токена
+        ttl: время до истечения токена в секундах
+    '''
+
+    if ttl > 0:
+        cache.set(REVOKED_TOKEN_CACHE_KEY.format(jti=jti), True, timeout=ttl)
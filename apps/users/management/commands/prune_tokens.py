@@ -0,0 +1,91 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from config.settings import USERS_TOKENS_PRUNE_BATCH_SIZE
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Удаление истекших refresh токенов и их записей в черном списке пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=USERS_TOKENS_PRUNE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Пауза между пачками в секундах',
+        )
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=0,
+            help='Удалять токены, истекшие больше указанного числа часов назад',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля')
+
+        started_at = time.monotonic()
+        count, batches = prune_tokens(
+            expired_before=timezone.now() - timedelta(hours=options['grace']),
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+        )
+
+        message = (
+            f'Удалено {count} истекших токенов пачками: {batches} '
+            f'за {time.monotonic() - started_at:.2f} с'
+        )
+        logger.info(
+            msg=message,
+        )
+        self.stdout.write(message)
+
+
+def prune_tokens(expired_before, batch_size: int, sleep: float = 0) -> (int, int):
+    '''
+    Удаление истекших токенов пачками в порядке истечения,
+    каждая пачка удаляется в отдельной короткой транзакции,
+    пачка выбирается по индексу (expires_at, id)
+
+    Args:
+        expired_before: удаляются токены, истекшие раньше этого времени
+        batch_size: размер пачки
+        sleep: пауза между пачками в секундах
+
+    Returns:
+        Количество удаленных токенов и пачек
+        2500, 3
+    '''
+
+    count = 0
+    batches = 0
+    tokens = OutstandingToken.objects.filter(
+        expires_at__lt=expired_before,
+    ).order_by('expires_at', 'id')
+    while ids := list(tokens.values_list('id', flat=True)[:batch_size]):
+        # записи черного списка удаляются каскадом в той же транзакции
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        count += len(ids)
+        batches += 1
+        if sleep and len(ids) == batch_size:
+            time.sleep(sleep)
+
+    return count, batches
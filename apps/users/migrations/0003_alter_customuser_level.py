@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_customuser_level'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='level',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Бесплатный'), (1, 'Базовый'), (2, 'Продвинутый'), (3, 'Премиум')], default=0, null=True, verbose_name='Уровень доступа'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    # на PostgreSQL индекс строится без блокировки записи в таблицу токенов,
+    # CONCURRENTLY нельзя выполнять в транзакции, поэтому миграция не атомарная
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f'CREATE INDEX {concurrently}IF NOT EXISTS users_outstanding_expires_idx '
+        'ON token_blacklist_outstandingtoken (expires_at, id)',
+    )
+
+
+def drop_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f'DROP INDEX {concurrently}IF EXISTS users_outstanding_expires_idx',
+    )
+
+
+class Migration(migrations.Migration):
+    # таблица принадлежит token_blacklist, поэтому индекс создается SQL,
+    # а не через Meta.indexes модели
+    atomic = False
+
+    dependencies = [
+        ('users', '0003_alter_customuser_level'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -72,9 +72,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         null=True,
         blank=True,
     )
-    level = models.CharField(
+    level = models.PositiveSmallIntegerField(
         verbose_name='Уровень доступа',
-        max_length=64,
         null=True,
         choices=ACCESS_LEVELS,
         default=ACCESS_LEVELS[0][0],
@@ -6,10 +6,11 @@ from django.db import IntegrityError
 from django.http import QueryDict
 from django.urls import reverse
 
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
 
 from notifications.services import Email
 
+from users.claims import ClaimsRefreshToken
 from users.models import CustomUser
 from users.serializers import (
     RegisterSerializer,
@@ -112,7 +113,7 @@ def register(data: QueryDict, get_url_func: Callable) -> (int, dict):
     )
 
     try:
-        token = RefreshToken.for_user(
+        token = ClaimsRefreshToken.for_user(
             user=user,
         )
     except Exception as exc:
@@ -201,7 +202,7 @@ def auth(data: QueryDict) -> (int, dict):
         )
 
     try:
-        token = RefreshToken.for_user(
+        token = ClaimsRefreshToken.for_user(
             user=user,
         )
     except Exception as exc:
@@ -266,7 +267,7 @@ def refresh_token(data: QueryDict) -> (int, dict):
 
     validated_data = serializer.validated_data
     try:
-        refresh = RefreshToken(validated_data['refresh'])
+        refresh = ClaimsRefreshToken(validated_data['refresh'])
     except Exception as exc:
         logger.error(
             msg='Не удалось обновить токен '
@@ -276,6 +277,22 @@ def refresh_token(data: QueryDict) -> (int, dict):
             status_code=403,
         )
 
+    # refresh токен живет дольше, чем кэш измененных данных пользователя,
+    # поэтому данные в новых токенах берутся из базы данных
+    user = CustomUser.objects.filter(
+        pk=refresh[api_settings.USER_ID_CLAIM],
+        is_active=True,
+    ).first()
+    if user is None:
+        logger.error(
+            msg='Не удалось обновить токен '
+                'Ошибки: Пользователь не найден или неактивен',
+        )
+        return generate_response(
+            status_code=403,
+        )
+    refresh.set_user_claims(user)
+
     response_data = {
         'access': str(refresh.access_token),
     }
@@ -339,7 +356,7 @@ def logout(data: QueryDict, user: CustomUser) -> (int, dict):
 
     validated_data = serializer.validated_data
     try:
-        refresh = RefreshToken(validated_data['refresh'])
+        refresh = ClaimsRefreshToken(validated_data['refresh'])
     except Exception as exc:
         logger.error(
             msg=f'Невалидный токен для выхода пользователя {user} '
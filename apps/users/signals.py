@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from users.blacklist import bump_blacklist_version
+from users.claims import (
+    USER_CLAIMS,
+    get_user_claims,
+    set_user_state,
+)
+from users.models import CustomUser
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_user_claims(sender, instance, raw=False, **kwargs):
+    instance._previous_claims = None
+    if instance.pk and not raw:
+        instance._previous_claims = CustomUser.objects.filter(
+            pk=instance.pk,
+        ).values(*USER_CLAIMS).first()
+
+
+@receiver(post_save, sender=CustomUser)
+def update_user_state(sender, instance, created, raw=False, **kwargs):
+    # выданные токены содержат старые данные, пока не истекут;
+    # QuerySet.update сигналов не отправляет, см. set_user_state
+    claims = get_user_claims(instance)
+    previous_claims = getattr(instance, '_previous_claims', None)
+    if created or raw or previous_claims is None or previous_claims == claims:
+        return
+    set_user_state(instance.pk, claims)
+
+
+@receiver(post_delete, sender=CustomUser)
+def deactivate_user_state(sender, instance, **kwargs):
+    set_user_state(instance.pk, {
+        **get_user_claims(instance),
+        'is_active': False,
+    })
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def update_blacklist_version(sender, instance, created, **kwargs):
+    # фильтры процессов догружают записи после смены версии,
+    # версия меняется после фиксации, чтобы запрос увидел запись
+    if created:
+        transaction.on_commit(bump_blacklist_version)
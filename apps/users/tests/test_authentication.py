@@ -0,0 +1,192 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import (
+    AllowAny,
+    IsAuthenticated,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.api import (
+    CustomUserView,
+    RegisterView,
+)
+from users.authentication import (
+    ClaimsUser,
+    CustomJWTAuthentication,
+    access_token_cache,
+    evict_access_token,
+    revoke_access_token,
+    get_token_digest,
+    get_view_registry,
+    is_anonymous_view,
+)
+from users.claims import (
+    ClaimsRefreshToken,
+    get_user_claims,
+    set_user_state,
+)
+from users.models import CustomUser
+
+
+class ClaimsAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='test@cc.com',
+            password='test123',
+            level=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authentication = CustomJWTAuthentication()
+        shared_cache = patch('users.authentication.is_shared_cache', return_value=True)
+        shared_cache.start()
+        self.addCleanup(shared_cache.stop)
+
+    def get_token(self):
+        access = str(ClaimsRefreshToken.for_user(self.user).access_token)
+        return self.authentication.get_validated_token(access)
+
+    def test_user_from_claims(self):
+        token = self.get_token()
+
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(token)
+
+            self.assertIsInstance(user, ClaimsUser)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.email, 'test@cc.com')
+            self.assertEqual(user.level, 1)
+            self.assertTrue(user.is_authenticated)
+
+    def test_token_without_claims(self):
+        token = AccessToken.for_user(self.user)
+
+        user = self.authentication.get_user(token)
+
+        self.assertIsInstance(user, CustomUser)
+
+    def test_local_cache(self):
+        token = self.get_token()
+
+        with patch('users.authentication.is_shared_cache', return_value=False):
+            user = self.authentication.get_user(token)
+
+        self.assertIsInstance(user, CustomUser)
+
+    def test_bulk_update(self):
+        token = self.get_token()
+        CustomUser.objects.filter(pk=self.user.pk).update(level=2)
+        self.user.refresh_from_db()
+        set_user_state(self.user.pk, get_user_claims(self.user))
+
+        user = self.authentication.get_user(token)
+
+        self.assertEqual(user.level, 2)
+
+    def test_level_change(self):
+        token = self.get_token()
+        self.user.level = 2
+        self.user.save()
+
+        user = self.authentication.get_user(token)
+
+        self.assertEqual(user.level, 2)
+
+    def test_deactivation(self):
+        token = self.get_token()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(token)
+
+
+class AccessTokenCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='test@cc.com',
+            password='test123',
+        )
+
+    def setUp(self):
+        cache.clear()
+        access_token_cache.clear()
+        self.authentication = CustomJWTAuthentication()
+        self.raw_token = str(ClaimsRefreshToken.for_user(self.user).access_token).encode()
+
+    def test_cached_token(self):
+        token = self.authentication.get_validated_token(self.raw_token)
+
+        with patch('rest_framework_simplejwt.authentication.JWTAuthentication.get_validated_token') as mock:
+            cached_token = self.authentication.get_validated_token(self.raw_token)
+
+        mock.assert_not_called()
+        self.assertIs(cached_token, token)
+        self.assertEqual(access_token_cache.stats()['hits'], 1)
+
+    def test_expired_token(self):
+        token = self.authentication.get_validated_token(self.raw_token)
+        key = get_token_digest(self.raw_token)
+        found, _ = access_token_cache.get(key)
+        expires_in = token['exp'] - time.time()
+
+        with patch('utils.cache.time.monotonic', return_value=time.monotonic() + expires_in + 1):
+            expired, _ = access_token_cache.get(key)
+
+        self.assertTrue(found)
+        self.assertFalse(expired)
+
+    def test_evict(self):
+        self.authentication.get_validated_token(self.raw_token)
+        evict_access_token(self.raw_token)
+
+        self.assertEqual(access_token_cache.stats()['size'], 0)
+
+    def test_revoke(self):
+        token = self.authentication.get_validated_token(self.raw_token)
+        revoke_access_token(token)
+
+        self.assertEqual(access_token_cache.stats()['size'], 0)
+        for claims_auth in (True, False):
+            with patch('users.authentication.is_shared_cache', return_value=claims_auth), \
+                    self.assertRaises(AuthenticationFailed):
+                self.authentication.get_user(self.authentication.get_validated_token(self.raw_token))
+
+
+class ViewRegistryTest(TestCase):
+
+    def test_registry(self):
+        registry = {
+            access['route']: access
+            for access in get_view_registry().values()
+        }
+
+        self.assertTrue(registry['api/v1/users/register/']['anonymous'])
+        self.assertFalse(registry['api/v1/users/']['anonymous'])
+        self.assertEqual(registry['api/v1/users/']['view'], 'users.api.CustomUserView')
+
+    def test_is_anonymous_view(self):
+        class AllowAnyOrigin(AllowAny):
+            pass
+
+        class NotAllowAny(IsAuthenticated):
+            pass
+
+        views = (
+            (True, RegisterView),
+            (False, CustomUserView),
+            (True, type('View', (), {'permission_classes': [AllowAnyOrigin]})),
+            (False, type('View', (), {'permission_classes': [NotAllowAny]})),
+            (False, type('View', (), {'permission_classes': [AllowAny, IsAuthenticated]})),
+            (False, type('View', (), {'permission_classes': [IsAuthenticated | AllowAny]})),
+        )
+
+        for anonymous, view in views:
+            self.assertEqual(is_anonymous_view(view), anonymous, msg=view.permission_classes)
@@ -0,0 +1,114 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from config.settings import USERS_BLACKLIST_FILTER_TTL
+
+from users.blacklist import (
+    BlacklistFilter,
+    blacklist_filter,
+    is_blacklist_filter_enabled,
+)
+from users.claims import ClaimsRefreshToken
+from users.models import CustomUser
+
+from utils.bloom import BloomFilter
+
+
+class BlacklistFilterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='test@cc.com',
+            password='test123',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.filter = BlacklistFilter()
+        shared_cache = patch('users.blacklist.is_shared_cache', return_value=True)
+        shared_cache.start()
+        self.addCleanup(shared_cache.stop)
+
+    def create_token(self, jti: str) -> OutstandingToken:
+        return OutstandingToken.objects.create(
+            user=self.user,
+            jti=jti,
+            token='token',
+            expires_at=timezone.now() + timezone.timedelta(days=1),
+        )
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f'jti-{index}')
+
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+
+        self.assertTrue(all(f'jti-{index}' in bloom for index in range(1000)))
+        self.assertLess(false_positives / 10000, 0.02)
+        self.assertAlmostEqual(bloom.false_positive_rate(), 0.01, delta=0.005)
+
+    def test_negative_without_query(self):
+        self.filter.might_contain('warmup')
+
+        with self.assertNumQueries(0):
+            self.assertFalse(self.filter.might_contain('unknown'))
+
+    def test_blacklisted_in_other_process(self):
+        self.filter.might_contain('warmup')
+        # версию меняет сигнал сохранения записи
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(
+                token=self.create_token('revoked'),
+            )
+
+        self.assertTrue(self.filter.might_contain('revoked'))
+
+    def test_blacklisted_without_version(self):
+        self.filter.might_contain('warmup')
+        # bulk_create не отправляет сигналы и не меняет версию
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token=self.create_token('revoked')),
+        ])
+
+        self.assertFalse(self.filter.might_contain('revoked'))
+        rebuild_at = time.monotonic() + USERS_BLACKLIST_FILTER_TTL + 1
+        with patch('users.blacklist.time.monotonic', return_value=rebuild_at):
+            self.assertTrue(self.filter.might_contain('revoked'))
+
+    def test_rebuild_without_lock(self):
+        self.filter.might_contain('warmup')
+
+        def estimate():
+            # проверки и добавления не ждут сборку фильтра
+            self.assertFalse(self.filter._lock.locked())
+            self.filter.add('added')
+            return 0
+
+        rebuild_at = time.monotonic() + USERS_BLACKLIST_FILTER_TTL + 1
+        with patch('users.blacklist.time.monotonic', return_value=rebuild_at), \
+                patch('users.blacklist.estimate_blacklist_size', side_effect=estimate) as estimate_size:
+            self.assertTrue(self.filter.might_contain('added'))
+        estimate_size.assert_called_once()
+
+    def test_local_cache(self):
+        with patch('users.blacklist.is_shared_cache', return_value=False):
+            self.assertFalse(is_blacklist_filter_enabled())
+
+    def test_blacklisted_token(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        token.blacklist()
+
+        with self.assertRaises(TokenError):
+            ClaimsRefreshToken(str(token))
+
+        self.assertGreaterEqual(blacklist_filter.stats()['size'], 1)
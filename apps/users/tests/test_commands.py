@@ -0,0 +1,52 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from users.models import CustomUser
+
+
+class PruneTokensTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='test@cc.com',
+            password='test123',
+        )
+        now = timezone.now()
+        for index in range(5):
+            token = OutstandingToken.objects.create(
+                user=cls.user,
+                jti=f'expired-{index}',
+                token='token',
+                expires_at=now - timedelta(days=index + 1),
+            )
+            BlacklistedToken.objects.create(
+                token=token,
+            )
+        OutstandingToken.objects.create(
+            user=cls.user,
+            jti='active',
+            token='token',
+            expires_at=now + timedelta(days=1),
+        )
+
+    def test_prune_tokens(self):
+        stdout = StringIO()
+
+        call_command('prune_tokens', '--batch-size', '2', stdout=stdout)
+
+        self.assertIn('Удалено 5 истекших токенов пачками: 3', stdout.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['active'])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_grace(self):
+        call_command('prune_tokens', '--grace', '60', stdout=StringIO())
+
+        self.assertEqual(OutstandingToken.objects.count(), 3)
@@ -56,6 +56,7 @@ PROJECT_APPS = [
     'users',
     'notifications',
     'characters',
+    'resizer',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + PROJECT_APPS
@@ -117,6 +118,22 @@ DATABASES = {
     }
 }
 
+# Cache
+
+CACHE_BACKEND = os.environ.get(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
+CACHE_LOCATION = os.environ.get(
+    'CACHE_LOCATION', ''
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION,
+    }
+}
+
 # DRF
 
 REST_FRAMEWORK = {
@@ -150,6 +167,32 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=7),
 }
 
+# Users
+
+USERS_CLAIMS_AUTH_ENABLED = os.environ.get(
+    'USERS_CLAIMS_AUTH_ENABLED', 'True'
+)
+USERS_CLAIMS_AUTH_ENABLED = USERS_CLAIMS_AUTH_ENABLED == 'True'
+USERS_TOKEN_CACHE_SIZE = int(os.environ.get(
+    'USERS_TOKEN_CACHE_SIZE', 4096
+))
+USERS_TOKENS_PRUNE_BATCH_SIZE = int(os.environ.get(
+    'USERS_TOKENS_PRUNE_BATCH_SIZE', 1000
+))
+USERS_BLACKLIST_FILTER_ENABLED = os.environ.get(
+    'USERS_BLACKLIST_FILTER_ENABLED', 'True'
+)
+USERS_BLACKLIST_FILTER_ENABLED = USERS_BLACKLIST_FILTER_ENABLED == 'True'
+USERS_BLACKLIST_FILTER_ERROR_RATE = float(os.environ.get(
+    'USERS_BLACKLIST_FILTER_ERROR_RATE', 0.01
+))
+USERS_BLACKLIST_FILTER_MIN_CAPACITY = int(os.environ.get(
+    'USERS_BLACKLIST_FILTER_MIN_CAPACITY', 10000
+))
+USERS_BLACKLIST_FILTER_TTL = int(os.environ.get(
+    'USERS_BLACKLIST_FILTER_TTL', 60
+))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -193,6 +236,26 @@ STATICFILES_DIRS = [
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "media/"
 
+MEDIA_RESIZE_CACHE_DIR = os.environ.get(
+    'MEDIA_RESIZE_CACHE_DIR', BASE_DIR / 'cache' / 'resized'
+)
+MEDIA_RESIZE_CACHE_SIZE = int(os.environ.get(
+    'MEDIA_RESIZE_CACHE_SIZE', 512 * 1024 * 1024
+))
+MEDIA_RESIZE_WIDTHS = [
+    int(width) for width in os.environ.get(
+        'MEDIA_RESIZE_WIDTHS', '64,128,256,512,1024'
+    ).split(',')
+]
+MEDIA_RESIZE_PREFIXES = [
+    'avatars/',
+    'thumbnails/',
+    'characters/',
+]
+MEDIA_RESIZE_MAX_AGE = int(os.environ.get(
+    'MEDIA_RESIZE_MAX_AGE', 365 * 24 * 60 * 60
+))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -215,6 +278,46 @@ EMAIL_PORT = os.environ.get(
 )
 EMAIL_USE_TLS = True
 
+# Characters
+
+CHARACTERS_API_KEY_CACHE_SIZE = int(os.environ.get(
+    'CHARACTERS_API_KEY_CACHE_SIZE', 1024
+))
+CHARACTERS_API_KEY_CACHE_TTL = int(os.environ.get(
+    'CHARACTERS_API_KEY_CACHE_TTL', 60
+))
+CHARACTERS_PAGE_MAX_LIMIT = int(os.environ.get(
+    'CHARACTERS_PAGE_MAX_LIMIT', 1000
+))
+CHARACTERS_STREAMING_THRESHOLD = int(os.environ.get(
+    'CHARACTERS_STREAMING_THRESHOLD', 5000
+))
+CHARACTERS_STREAMING_CHUNK_SIZE = int(os.environ.get(
+    'CHARACTERS_STREAMING_CHUNK_SIZE', 2000
+))
+CHARACTERS_IDS_CHUNK_SIZE = int(os.environ.get(
+    'CHARACTERS_IDS_CHUNK_SIZE', 1000
+))
+CHARACTERS_STATS_HISTOGRAM_BINS = int(os.environ.get(
+    'CHARACTERS_STATS_HISTOGRAM_BINS', 10
+))
+CHARACTERS_IMPORT_BATCH_SIZE = int(os.environ.get(
+    'CHARACTERS_IMPORT_BATCH_SIZE', 1000
+))
+CHARACTERS_CHANGES_OVERLAP = int(os.environ.get(
+    'CHARACTERS_CHANGES_OVERLAP', 5
+))
+CHARACTERS_STORE_ENABLED = os.environ.get(
+    'CHARACTERS_STORE_ENABLED', 'False'
+)
+CHARACTERS_STORE_ENABLED = CHARACTERS_STORE_ENABLED == 'True'
+CHARACTERS_DISABLED_LEVELS_TTL = int(os.environ.get(
+    'CHARACTERS_DISABLED_LEVELS_TTL', 5
+))
+CHARACTERS_CATALOG_TTL = int(os.environ.get(
+    'CHARACTERS_CATALOG_TTL', 300
+))
+
 
 # fixtures
 
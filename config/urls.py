@@ -24,4 +24,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/users/', include('users.urls')),
     path('api/v1/characters/', include('characters.urls')),
+    path('api/v1/media/', include('resizer.urls')),
 ]
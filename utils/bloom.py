@@ -0,0 +1,47 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    '''
+    Вероятностное множество строк: отсутствие проверяется точно,
+    присутствие - с вероятностью ложного срабатывания
+    '''
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        # размер и число хэшей, оптимальные для capacity элементов
+        self.size = max(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _get_positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, value: str) -> None:
+        for position in self._get_positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._get_positions(value)
+        )
+
+    def false_positive_rate(self) -> float:
+        '''
+        Оценка вероятности ложного срабатывания при текущем заполнении
+
+        Returns:
+            Вероятность
+            0.0098
+        '''
+
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+# кэши, которые видит только текущий процесс
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias: str = 'default') -> bool:
+    '''
+    Проверка, что кэш общий для всех процессов,
+    только через такой кэш изменения доходят до других процессов
+
+    Args:
+        alias: имя кэша в CACHES
+
+    Returns:
+        Признак общего кэша
+    '''
+
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+class TTLCache:
+    '''
+    Ограниченный LRU кэш в памяти процесса с временем жизни записей
+    '''
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> (bool, object):
+        '''
+        Получение значения из кэша
+
+        Args:
+            key: ключ
+
+        Returns:
+            Признак попадания и значение
+            True, '1'
+        '''
+
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        '''
+        Сохранение значения в кэш
+
+        Args:
+            key: ключ
+            value: значение, None тоже кэшируется
+            ttl: время жизни записи в секундах, по умолчанию self.ttl
+        '''
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        '''
+        Статистика кэша
+
+        Returns:
+            Словарь данных
+            {
+                "hits": 10,
+                "misses": 2,
+                "hit_rate": 0.83,
+                "size": 2,
+                "max_size": 1024
+            }
+        '''
+
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._data),
+                'max_size': self.max_size,
+            }
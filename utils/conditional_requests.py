@@ -0,0 +1,58 @@
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+from rest_framework.request import Request
+
+
+def is_not_modified(request: Request, etag: str, last_modified: int | None) -> bool:
+    '''
+    Проверка условных заголовков If-None-Match и If-Modified-Since
+
+    Args:
+        request: запрос
+        etag: версия ответа без кавычек
+        last_modified: время изменения ответа в секундах, None если неизвестно
+
+    Returns:
+        True если у клиента актуальная версия ответа
+    '''
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = [
+            tag.removeprefix('W/') for tag in parse_etags(if_none_match)
+        ]
+        return '*' in etags or quote_etag(etag) in etags
+
+    if_modified_since = parse_http_date_safe(
+        request.headers.get('If-Modified-Since', ''),
+    )
+    return (
+        if_modified_since is not None
+        and last_modified is not None
+        and last_modified <= if_modified_since
+    )
+
+
+def set_validators(response: HttpResponse, etag: str, last_modified: int) -> HttpResponse:
+    '''
+    Установка заголовков ETag, Last-Modified и Vary
+
+    Args:
+        response: ответ
+        etag: версия ответа без кавычек
+        last_modified: время изменения ответа в секундах, None если неизвестно
+
+    Returns:
+        Ответ с заголовками
+    '''
+
+    response['ETag'] = quote_etag(etag)
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Api-Key'])
+    return response
@@ -7,9 +7,15 @@ EMAIL_TYPES = (
     (PASSWORD_RESTORE, 'Восстановление пароля'),
 )
 
+CHARACTER_STATS = (
+    'hp',
+    'attack',
+    'speed',
+)
+
 ACCESS_LEVELS = (
-    ('0', 'Бесплатный'),
-    ('1', 'Базовый'),
-    ('2', 'Продвинутый'),
-    ('3', 'Премиум'),
+    (0, 'Бесплатный'),
+    (1, 'Базовый'),
+    (2, 'Продвинутый'),
+    (3, 'Премиум'),
 )
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+
+class DiskLRUCache:
+    '''
+    Ограниченный по размеру LRU кэш файлов на локальном диске,
+    одновременные промахи по одному ключу выполняют создание один раз;
+    размер и порядок вытеснения берутся из каталога, поэтому кэш
+    общий для всех процессов, работающих с одним каталогом
+    '''
+
+    def __init__(self, directory: str | Path, max_size: int):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.size = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _scan(self) -> list:
+        # время изменения файла обновляется при каждом чтении
+        # и служит временем последнего доступа
+        entries = []
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.is_file():
+                    entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        return entries
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # точное время вместо грубых часов файловой системы,
+        # чтобы порядок доступов в пределах одного тика сохранялся
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def _evict(self) -> None:
+        entries = sorted(self._scan())
+        size = sum(entry[2] for entry in entries)
+        for _, key, file_size in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(self.directory / key)
+            except FileNotFoundError:
+                # файл уже вытеснен другим процессом
+                pass
+            size -= file_size
+        self.size = size
+
+    def get(self, key: str) -> Path | None:
+        '''
+        Получение пути файла из кэша
+
+        Args:
+            key: ключ, используется как имя файла
+                "2c26b46b68ffc68f.webp"
+
+        Returns:
+            Путь файла или None при промахе
+        '''
+
+        path = self.directory / key
+        try:
+            self._touch(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def set(self, key: str, content: bytes) -> Path:
+        '''
+        Сохранение файла в кэш с вытеснением давно неиспользуемых
+
+        Args:
+            key: ключ, используется как имя файла
+            content: содержимое файла
+
+        Returns:
+            Путь файла
+        '''
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # запись во временный файл и переименование, чтобы читатели
+        # не получили недописанный файл
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.')
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(content)
+        path = self.directory / key
+        os.replace(temp_path, path)
+        self._touch(path)
+
+        with self._lock:
+            self._evict()
+        return path
+
+    def get_or_create(self, key: str, create: Callable[[], bytes]) -> Path:
+        '''
+        Получение файла из кэша или создание при промахе,
+        одновременные запросы одного ключа ждут первого
+
+        Args:
+            key: ключ, используется как имя файла
+            create: функция создания содержимого файла
+
+        Returns:
+            Путь файла
+        '''
+
+        path = self.get(key)
+        if path is not None:
+            return path
+
+        with self._lock:
+            key_lock, waiters = self._key_locks.get(key, (threading.Lock(), 0))
+            self._key_locks[key] = (key_lock, waiters + 1)
+
+        try:
+            with key_lock:
+                path = self.get(key)
+                if path is None:
+                    path = self.set(key, create())
+                return path
+        finally:
+            with self._lock:
+                key_lock, waiters = self._key_locks[key]
+                if waiters == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (key_lock, waiters - 1)
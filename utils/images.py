@@ -0,0 +1,72 @@
+import io
+
+from PIL import Image
+
+
+# расширение и параметры сохранения форматов уменьшенных изображений
+IMAGE_FORMATS = {
+    'jpeg': ('jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+}
+
+
+def open_for_width(image: Image.Image, width: int) -> Image.Image:
+    '''
+    Декодирование изображения для уменьшения до ширины
+
+    Args:
+        image: открытое изображение
+        width: наибольшая нужная ширина в пикселях
+
+    Returns:
+        Декодированное изображение в режиме RGB или RGBA
+    '''
+
+    # draft позволяет JPEG декодеру сразу уменьшить изображение в 2-8 раз
+    image.draft('RGB', (width, max(1, image.height * width // image.width)))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    return image
+
+
+def resize(image: Image.Image, width: int) -> Image.Image:
+    '''
+    Уменьшение изображения до ширины: сначала быстрое целочисленное
+    уменьшение reduce, затем точное с фильтром LANCZOS
+
+    Args:
+        image: декодированное изображение
+        width: ширина в пикселях
+
+    Returns:
+        Уменьшенное изображение, меньшие изображения не увеличиваются
+    '''
+
+    # reduce оставляет запас в два раза для качественного LANCZOS
+    factor = image.width // (width * 2)
+    if factor >= 2:
+        image = image.reduce(factor)
+    if image.width <= width:
+        return image.copy()
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode(image: Image.Image, image_format: str) -> bytes:
+    '''
+    Сохранение изображения в байты
+
+    Args:
+        image: изображение
+        image_format: формат из IMAGE_FORMATS
+            "webp"
+
+    Returns:
+        Содержимое файла
+    '''
+
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    content = io.BytesIO()
+    image.save(content, format=image_format.upper(), **IMAGE_FORMATS[image_format][1])
+    return content.getvalue()
@@ -0,0 +1,50 @@
+import base64
+import json
+
+
+def encode_cursor(position: dict) -> str:
+    '''
+    Кодирование позиции страницы в непрозрачный курсор
+
+    Args:
+        position: позиция
+            {
+              "id": 10
+            }
+
+    Returns:
+        Курсор
+        "eyJpZCI6MTB9"
+    '''
+
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    '''
+    Декодирование курсора в позицию страницы
+
+    Args:
+        cursor: курсор
+            "eyJpZCI6MTB9"
+
+    Returns:
+        Позиция
+        {
+          "id": 10
+        }
+
+    Raises:
+        ValueError: невалидный курсор
+    '''
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except Exception as exc:
+        raise ValueError(f'Невалидный курсор {cursor}') from exc
+
+    if not isinstance(position, dict):
+        raise ValueError(f'Невалидный курсор {cursor}')
+    return position